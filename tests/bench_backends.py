@@ -0,0 +1,77 @@
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from warlist_backends import EDIT_DELETE, CactusBackend, TaterBackend  # noqa: E402
+from warlist_backup import BackupStore  # noqa: E402
+from warlist_core import cactus_db, tater_cache  # noqa: E402
+from test_backends import write_raw  # noqa: E402
+
+# the same workload on every backend, timed step by step:
+# python tests/bench_backends.py [rows]
+
+BACKENDS = ((TaterBackend, 'wars.cfg'), (CactusBackend, 'wars.sqlite3'))
+
+
+def make_rows(count, rng):
+    chars = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    rows = []
+    for i in range(count):
+        nick = ''.join(rng.choice(chars) for _ in range(rng.randint(3, 12))) + str(i)
+        rows.append(('enemy' if rng.random() < 0.8 else 'team', nick, '', 'reason %d' % i))
+    return rows
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def run(cls, path, rows, rng):
+    backend = cls(path)
+    store = BackupStore.for_backend(backend)
+    half = len(rows) // 2
+    steps = []
+    result, took = timed(lambda: backend.apply_batch(rows[:half], store=store))
+    steps.append(('apply_batch', took, result['added']))
+    tater_cache.invalidate(path)
+    cactus_db.invalidate(path)
+    keys, took = timed(backend.load_keys)
+    steps.append(('load_keys', took, len(keys)))
+    (new, dups), took = timed(lambda: backend.diff(rows))
+    steps.append(('diff', took, len(new)))
+    result, took = timed(lambda: backend.apply_batch(rows, store=store))
+    steps.append(('apply_batch', took, result['added']))
+    entries = list(backend.iter_entries())
+    targets = {entry[0]: entry[1:] for entry in rng.sample(entries, len(entries) // 100)}
+    result, took = timed(lambda: backend.edit_entries(targets, EDIT_DELETE, store=store))
+    steps.append(('edit_entries', took, result['changed']))
+    # another client's writes: a case variant of every hundredth row
+    write_raw(backend, [(group, nick.upper(), clan, reason) for group, nick, clan, reason in rows[::100]])
+    result, took = timed(lambda: backend.compact(store=store))
+    steps.append(('compact', took, result['removed']))
+    done, took = timed(lambda: store.undo(4))
+    steps.append(('undo x4', took, len(done)))
+    done, took = timed(lambda: store.redo(4))
+    steps.append(('redo x4', took, len(done)))
+    cactus_db.invalidate(path)
+    return steps
+
+
+def main(count):
+    rows = make_rows(count, random.Random(1))
+    with tempfile.TemporaryDirectory() as tmp:
+        for cls, name in BACKENDS:
+            steps = run(cls, Path(tmp) / name, rows, random.Random(2))
+            print(f'{cls.__name__}, {count} rows:')
+            for step, took, n in steps:
+                print(f'  {step:<13} {took:7.3f} s  ({n})')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
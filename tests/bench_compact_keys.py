@@ -0,0 +1,83 @@
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from warlist_core import CompactKeySet, iter_existing_keys, quote_field  # noqa: E402
+
+# CompactKeySet against the set of tuples it replaced, both built from the
+# same cfg text: memory held after the build, peak during it, build time
+# and lookups (half hits, half misses) per second:
+# python tests/bench_compact_keys.py [keys]
+
+ALPHABETS = {
+    'ascii': 'abcdefghijklmnopqrstuvwxyz0123456789_',
+    'cyrillic': 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя0123456789',
+}
+
+
+def make_lines(count, alphabet, rng):
+    lines = []
+    for i in range(count):
+        nick = ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 12))) + str(i)
+        clan = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+        group = 'enemy' if rng.random() < 0.8 else 'team'
+        lines.append(f'add_war_entry {quote_field(group)} {quote_field(nick)} {quote_field(clan)} ""')
+    return lines
+
+
+def build_compact(text):
+    keys = CompactKeySet(iter_existing_keys(text))
+    keys.pack()
+    return keys
+
+
+def build_set(text):
+    return set(iter_existing_keys(text))
+
+
+def measure(build, text):
+    started = time.perf_counter()
+    build(text)
+    took = time.perf_counter() - started
+    tracemalloc.start()
+    store = build(text)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, took, held, peak
+
+
+def lookups(store, probes):
+    started = time.perf_counter()
+    found = sum(1 for key in probes if key in store)
+    return found, len(probes) / (time.perf_counter() - started)
+
+
+def main(count):
+    rng = random.Random(1)
+    cases = [(name, make_lines(count, alphabet, rng)) for name, alphabet in ALPHABETS.items()]
+    # one wide character would widen a str blob for every key
+    cases.append(('ascii + one emoji', cases[0][1][:-1] + ['add_war_entry "enemy" "nick\U0001F600" "" ""']))
+    for name, lines in cases:
+        text = '\n'.join(lines) + '\n'
+        keys = list(iter_existing_keys(text))
+        probes = rng.sample(keys, min(len(keys), 100000))
+        probes += [(group, nick + '#', clan) for group, nick, clan in probes]
+        print(f'{count} {name} keys:')
+        results = []
+        for label, build in (('set', build_set), ('CompactKeySet', build_compact)):
+            store, took, held, peak = measure(build, text)
+            found, rate = lookups(store, probes)
+            results.append(found)
+            print(f'  {label:<14} build {took:5.2f} s, held {held / len(keys):5.1f} B/key, '
+                  f'peak {peak / 1e6:6.1f} MB, {rate / 1e6:4.2f} M lookups/s')
+            del store
+        if results[0] != results[1]:
+            raise SystemExit('lookup results differ')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300000)
@@ -0,0 +1,46 @@
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from warlist_core import parse_existing_entries, quote_field  # noqa: E402
+from test_parse_war_line import shlex_entries  # noqa: E402
+
+# parse_existing_entries against the shlex.split version it replaced, on
+# editor-written lines: python tests/bench_parse_war_line.py [lines]
+
+
+def make_text(count, escapes, rng):
+    chars = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 '
+    if escapes:
+        chars += '"\\'
+    lines = []
+    for _ in range(count):
+        fields = ['enemy' if rng.random() < 0.8 else 'team']
+        fields += [''.join(rng.choice(chars) for _ in range(rng.randint(0, 15))) for _ in range(3)]
+        lines.append('add_war_entry ' + ' '.join(quote_field(f) for f in fields))
+    return '\n'.join(lines) + '\n'
+
+
+def timed(fn, text):
+    started = time.perf_counter()
+    result = fn(text)
+    return result, time.perf_counter() - started
+
+
+def main(count):
+    rng = random.Random(1)
+    for escapes in (False, True):
+        text = make_text(count, escapes, rng)
+        old, old_time = timed(shlex_entries, text)
+        new, new_time = timed(parse_existing_entries, text)
+        if old != new:
+            raise SystemExit('key sets differ')
+        print(f'{count} lines{" with escapes" if escapes else ""}: shlex {old_time:.2f} s, '
+              f'parse_war_line {new_time:.2f} s, {old_time / new_time:.1f}x, keys identical')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
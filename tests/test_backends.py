@@ -0,0 +1,294 @@
+import sqlite3
+
+import pytest
+
+from warlist_backends import EDIT_DELETE, EDIT_GROUP, EDIT_REASON, CactusBackend, TaterBackend, WarlistBackend
+from warlist_backup import BackupStore
+from warlist_core import STATE_MAP, WARS_SCHEMA, BackupConflictError, cactus_db, cactus_query_plan, quote_field
+
+# the contract every WarlistBackend keeps, run against each of them. Nicks
+# are ascii: Cactus matches them with SQLite's lower(), which folds ascii
+# only. Clans stay empty, Cactus has none. Rows are compared sorted, since
+# Cactus inserts a batch grouped by state.
+
+BACKENDS = [
+    pytest.param((TaterBackend, 'wars.cfg'), id='tater'),
+    pytest.param((CactusBackend, 'wars.sqlite3'), id='cactus'),
+]
+
+ROWS = [
+    ('enemy', 'Alpha', '', 'spam'),
+    ('team', 'Bravo', '', ''),
+    ('enemy', 'Charlie', '', 'grief "hard"'),
+    ('enemy', 'Delta', '', 'back\\slash'),
+    ('team', 'Echo', '', 'friend'),
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path):
+    cls, name = request.param
+    backend = cls(tmp_path / name)
+    yield backend
+    cactus_db.invalidate(backend.path)
+
+
+def rows_of(backend):
+    return sorted(tuple(row) for row in backend.iter_rows())
+
+
+def entry_of(backend, nick):
+    # (ref, fields) of the entry with this nick, as the browser would hold it
+    for entry in backend.iter_entries():
+        if entry[2] == nick:
+            return {entry[0]: entry[1:]}
+    raise KeyError(nick)
+
+
+def write_raw(backend, rows):
+    # the way another client would write them: no duplicate check
+    if backend.cactus:
+        conn = sqlite3.connect(str(backend.path))
+        with conn:
+            conn.execute(WARS_SCHEMA)
+            conn.executemany("INSERT INTO wars (name, state, reason) VALUES (?, ?, ?)",
+                             [(nick, STATE_MAP[group], reason) for group, nick, clan, reason in rows])
+        conn.close()
+    else:
+        with backend.path.open('a', encoding='utf-8') as f:
+            for row in rows:
+                f.write('add_war_entry ' + ' '.join(quote_field(field) for field in row) + '\n')
+    backend.refresh()
+
+
+def test_base_is_abstract():
+    with pytest.raises(TypeError):
+        WarlistBackend('wars.cfg')
+
+
+def test_missing_file(backend):
+    assert not backend.path.exists()
+    assert len(backend.load_keys()) == 0
+    assert rows_of(backend) == []
+    assert backend.diff(ROWS) == (ROWS, [])
+
+
+def test_apply_batch_and_load_keys(backend):
+    result = backend.apply_batch(ROWS + [('enemy', 'ALPHA', '', 'again')])
+    assert (result['added'], result['skipped'], result['cancelled']) == (len(ROWS), 1, False)
+    assert rows_of(backend) == sorted(ROWS)
+    keys = backend.load_keys()
+    assert all(backend.key(*row[:3]) in keys for row in ROWS)
+    assert backend.key('enemy', 'alpha', '') in keys
+    assert backend.key('team', 'Alpha', '') not in keys
+    assert backend.key('enemy', 'Foxtrot', '') not in keys
+
+
+def test_apply_batch_skips_existing(backend):
+    backend.apply_batch(ROWS)
+    result = backend.apply_batch([('enemy', 'alpha', '', 'x'), ('enemy', 'Golf', '', '')])
+    assert (result['added'], result['skipped']) == (1, 1)
+    assert rows_of(backend) == sorted(ROWS + [('enemy', 'Golf', '', '')])
+
+
+def test_apply_batch_accepts_a_generator(backend):
+    result = backend.apply_batch(row for row in ROWS)
+    assert result['added'] == len(ROWS)
+    assert rows_of(backend) == sorted(ROWS)
+
+
+def test_diff(backend):
+    backend.apply_batch(ROWS[:3])
+    fresh = [('team', 'alpha', '', ''), ('enemy', 'Hotel', '', ''), ('enemy', 'HOTEL', '', 'again')]
+    new, dups = backend.diff([('enemy', 'bravo', '', '')] + ROWS[:2] + fresh)
+    assert new == [('enemy', 'bravo', '', ''), ('team', 'alpha', '', ''), ('enemy', 'Hotel', '', '')]
+    assert dups == ROWS[:2] + [('enemy', 'HOTEL', '', 'again')]
+    seen = set()
+    backend.diff(fresh[:1], seen)
+    assert backend.diff(fresh[:1], seen) == ([], fresh[:1])
+
+
+def test_snapshot_restore(backend, tmp_path):
+    backend.apply_batch(ROWS[:3])
+    snap = tmp_path / ('snap' + backend.path.suffix)
+    backend.snapshot(snap)
+    backend.apply_batch(ROWS[3:])
+    backend.restore(snap)
+    backend.refresh()
+    assert rows_of(backend) == sorted(ROWS[:3])
+    assert backend.key('enemy', 'Delta', '') not in backend.load_keys()
+
+
+def test_compact_keeps_first(backend):
+    backend.apply_batch(ROWS)
+    write_raw(backend, [('enemy', 'alpha', '', 'dup'), ('team', 'ECHO', '', 'dup'), ('enemy', 'India', '', ''),
+                        ('enemy', 'india', '', 'dup')])
+    result = backend.compact()
+    assert (result['removed'], result['cancelled']) == (3, False)
+    assert rows_of(backend) == sorted(ROWS + [('enemy', 'India', '', '')])
+    assert backend.compact()['removed'] == 0
+
+
+def test_edit_entries(backend):
+    backend.apply_batch(ROWS)
+    entries = list(backend.iter_entries())
+    assert sorted(entry[1:] for entry in entries) == sorted(ROWS)
+    assert [entry[0] for entry in entries] == sorted(entry[0] for entry in entries)
+    # refs may shift after a delete: every edit starts from a fresh listing
+    assert backend.edit_entries(entry_of(backend, 'Bravo'), EDIT_DELETE)['changed'] == 1
+    assert backend.edit_entries(entry_of(backend, 'Alpha'), EDIT_REASON, 'new "reason"')['changed'] == 1
+    assert backend.edit_entries(entry_of(backend, 'Charlie'), EDIT_GROUP, 'team')['changed'] == 1
+    assert rows_of(backend) == sorted([('enemy', 'Alpha', '', 'new "reason"'), ('team', 'Charlie', '', 'grief "hard"'),
+                                       ROWS[3], ROWS[4]])
+    keys = backend.load_keys()
+    assert backend.key('team', 'charlie', '') in keys
+    assert backend.key('enemy', 'charlie', '') not in keys
+    assert backend.key('team', 'Bravo', '') not in keys
+
+
+def test_edit_group_skips_duplicates(backend):
+    backend.apply_batch(ROWS + [('enemy', 'echo', '', '')])
+    result = backend.edit_entries(entry_of(backend, 'echo'), EDIT_GROUP, 'team')
+    assert (result['changed'], result['skipped']) == (0, 1)
+    assert rows_of(backend) == sorted(ROWS + [('enemy', 'echo', '', '')])
+
+
+def test_edit_entries_refuses_stale_refs(backend):
+    backend.apply_batch(ROWS)
+    entries = list(backend.iter_entries())
+    stale = {entries[0][0]: ('enemy', 'Zulu', '', '')}
+    with pytest.raises(ValueError):
+        backend.edit_entries(stale, EDIT_DELETE)
+    assert rows_of(backend) == sorted(ROWS)
+
+
+def test_undo_redo(backend):
+    # a file another client wrote, with a duplicate for compact to drop
+    write_raw(backend, [('enemy', 'India', '', ''), ('enemy', 'india', '', 'dup')])
+    store = BackupStore.for_backend(backend)
+    states = [rows_of(backend)]
+    backend.apply_batch(ROWS[:3], store=store)
+    states.append(rows_of(backend))
+    backend.apply_batch(ROWS[3:], store=store)
+    states.append(rows_of(backend))
+    backend.edit_entries(entry_of(backend, 'Delta'), EDIT_REASON, 'edited', store=store)
+    states.append(rows_of(backend))
+    assert backend.compact(store=store)['removed'] == 1
+    states.append(rows_of(backend))
+    assert len(store.history()) == 4
+    for state in reversed(states[:-1]):
+        store.undo()
+        backend.refresh()
+        assert rows_of(backend) == state
+    assert store.undo() == []
+    store.redo(2)
+    backend.refresh()
+    assert rows_of(backend) == states[2]
+    store.redo(2)
+    backend.refresh()
+    assert rows_of(backend) == states[-1]
+
+
+def test_backups_keep_the_chosen_client(tmp_path):
+    # a Cactus base under a name the extension would take for a cfg
+    backend = CactusBackend(tmp_path / 'wars.cfg')
+    store = BackupStore.for_backend(backend)
+    assert store.backend.cactus
+    backend.apply_batch(ROWS[:2], store=store)
+    backend.apply_batch(ROWS[2:], store=store)
+    store.undo()
+    backend.refresh()
+    assert rows_of(backend) == sorted(ROWS[:2])
+    store.redo()
+    backend.refresh()
+    assert rows_of(backend) == sorted(ROWS)
+    cactus_db.invalidate(backend.path)
+
+
+def test_cactus_undo_refuses_changed_rows(tmp_path):
+    # undo and redo work on rowids: one another client rewrote since is
+    # left alone
+    backend = CactusBackend(tmp_path / 'wars.sqlite3')
+    store = BackupStore.for_backend(backend)
+    backend.apply_batch(ROWS[:2], store=store)
+    backend.edit_entries(entry_of(backend, 'Alpha'), EDIT_REASON, 'edited', store=store)
+    conn = sqlite3.connect(str(backend.path))
+    with conn:
+        conn.execute("UPDATE wars SET reason = 'foreign' WHERE name = 'Alpha'")
+    conn.close()
+    backend.refresh()
+    changed = rows_of(backend)
+    for steps in (1, 2):
+        with pytest.raises(BackupConflictError):
+            store.undo(steps)
+        backend.refresh()
+        assert rows_of(backend) == changed
+    conn = sqlite3.connect(str(backend.path))
+    with conn:
+        conn.execute("UPDATE wars SET reason = 'edited' WHERE name = 'Alpha'")
+    conn.close()
+    store.undo(2)
+    backend.refresh()
+    assert rows_of(backend) == []
+    # a rowid taken by another row before the redo
+    write_raw(backend, [('enemy', 'Zulu', '', '')])
+    conn = sqlite3.connect(str(backend.path))
+    with conn:
+        conn.execute("UPDATE wars SET rowid = 1")
+    conn.close()
+    backend.refresh()
+    with pytest.raises(BackupConflictError):
+        store.redo()
+    backend.refresh()
+    assert rows_of(backend) == [('enemy', 'Zulu', '', '')]
+    cactus_db.invalidate(backend.path)
+
+
+def test_cactus_compact_keeps_bare_rowids(tmp_path):
+    # no INTEGER PRIMARY KEY: VACUUM would renumber the rowids the undo
+    # history names, so compact leaves the pages alone
+    backend = CactusBackend(tmp_path / 'wars.sqlite3')
+    conn = sqlite3.connect(str(backend.path))
+    with conn:
+        conn.execute("CREATE TABLE wars (name TEXT, state INTEGER, reason TEXT)")
+        conn.executemany("INSERT INTO wars (name, state, reason) VALUES (?, ?, ?)",
+                         [(nick, STATE_MAP[group], reason) for group, nick, clan, reason in ROWS])
+        conn.execute("DELETE FROM wars WHERE name IN ('Alpha', 'Charlie')")
+    conn.close()
+    write_raw(backend, [('team', 'echo', '', 'dup')])
+    store = BackupStore.for_backend(backend)
+    before = rows_of(backend)
+    ids = [entry[0] for entry in backend.iter_entries()]
+    assert backend.compact(store=store)['removed'] == 1
+    assert [entry[0] for entry in backend.iter_entries()] == ids[:-1]
+    store.undo()
+    backend.refresh()
+    assert rows_of(backend) == before
+    cactus_db.invalidate(backend.path)
+
+
+def test_edit_entries_refuses_changed_group_or_reason(backend):
+    backend.apply_batch(ROWS)
+    ref, (group, nick, clan, reason) = next(iter(entry_of(backend, 'Alpha').items()))
+    for stale in (('team', nick, clan, reason), (group, nick, clan, 'other')):
+        with pytest.raises(ValueError):
+            backend.edit_entries({ref: stale}, EDIT_DELETE)
+    assert rows_of(backend) == sorted(ROWS)
+
+
+def test_cactus_edit_group_folds_non_ascii(tmp_path):
+    backend = CactusBackend(tmp_path / 'wars.sqlite3')
+    write_raw(backend, [('enemy', 'Иван', '', ''), ('team', 'иван', '', '')])
+    result = backend.edit_entries(entry_of(backend, 'Иван'), EDIT_GROUP, 'team')
+    assert (result['changed'], result['skipped']) == (0, 1)
+    cactus_db.invalidate(backend.path)
+
+
+def test_cactus_query_plan_explains_the_batch_lookups(tmp_path):
+    backend = CactusBackend(tmp_path / 'wars.sqlite3')
+    backend.apply_batch(ROWS)
+    with cactus_db.connection(backend.path) as conn:
+        plan = cactus_query_plan(conn)
+    assert any(line.startswith('probe: ') and 'wle_probe' in line for line in plan)
+    assert any(line.startswith('anti-join: ') and 'wle_batch' in line for line in plan)
+    cactus_db.invalidate(backend.path)
@@ -0,0 +1,93 @@
+import random
+import shlex
+
+import pytest
+
+from warlist_core import parse_existing_entries, parse_war_line, quote_field, split_cfg_line
+
+# parse_war_line replaced shlex.split; every line has to come out the same,
+# malformed ones included
+
+FUZZ_LINES = 20000
+ALPHABET = ['a', 'B', '7', ' ', ' ', '\t', '"', '"', "'", '\\', '\\\\', '\\"', 'ß', 'Ж', '　', '\0', '#', '$']
+
+
+def shlex_tokens(line):
+    try:
+        return shlex.split(line)
+    except ValueError:
+        return None
+
+
+def shlex_key(line):
+    parts = shlex_tokens(line)
+    if parts and len(parts) >= 4 and parts[0] == 'add_war_entry':
+        return parts[1], parts[2], parts[3]
+    return None
+
+
+def shlex_entries(text):
+    # parse_existing_entries as it was, on shlex.split
+    existing = set()
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or not line.startswith('add_war_entry'):
+            continue
+        key = shlex_key(line)
+        if key:
+            group, nick, clan = key
+            existing.add((group, nick.casefold(), clan.casefold()))
+    return existing
+
+
+def random_field(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 8)))
+
+
+def fuzz_line(rng):
+    kind = rng.random()
+    if kind < 0.4:
+        # what the editor writes, with awkward field contents
+        fields = [random_field(rng) for _ in range(rng.randint(3, 5))]
+        return 'add_war_entry ' + ' '.join(quote_field(f) for f in fields)
+    if kind < 0.8:
+        # hand-edited: unquoted, single-quoted, broken quoting
+        parts = []
+        for _ in range(rng.randint(1, 6)):
+            field = random_field(rng)
+            parts.append(rng.choice([field, f'"{field}"', f"'{field}'", f'"{field}', field + '\\']))
+        return 'add_war_entry' + rng.choice([' ', '\t', '  ']) + ' '.join(parts)
+    return ''.join(rng.choice(ALPHABET + ['add_war_entry']) for _ in range(rng.randint(0, 12)))
+
+
+@pytest.fixture(scope='module')
+def fuzzed():
+    rng = random.Random(4)
+    return [fuzz_line(rng).strip() for _ in range(FUZZ_LINES)]
+
+
+def test_split_cfg_line_matches_shlex(fuzzed):
+    mismatches = [line for line in fuzzed if split_cfg_line(line) != shlex_tokens(line)]
+    assert mismatches == []
+
+
+def test_parse_war_line_matches_shlex(fuzzed):
+    mismatches = [line for line in fuzzed if line.startswith('add_war_entry')
+                  and parse_war_line(line) != shlex_key(line)]
+    assert mismatches == []
+
+
+def test_parse_existing_entries_matches_shlex(fuzzed):
+    text = '\n'.join(fuzzed)
+    assert parse_existing_entries(text) == shlex_entries(text)
+
+
+@pytest.mark.parametrize('line, key', [
+    ('add_war_entry "enemy" "King" "" "spam"', ('enemy', 'King', '')),
+    ('add_war_entry "team" "a \\"b\\"" "c\\\\d" ""', ('team', 'a "b"', 'c\\d')),
+    ("add_war_entry enemy 'x y' z", ('enemy', 'x y', 'z')),
+    ('add_war_entry "enemy" "unterminated', None),
+    ('add_war_entry "enemy" "only two"', None),
+])
+def test_parse_war_line_examples(line, key):
+    assert parse_war_line(line) == key
@@ -0,0 +1,39 @@
+import os
+
+from warlist_core import TaterParseCache, parse_existing_entries
+
+# the cache must give the keys a full parse would, whichever way the file
+# changed
+
+
+def war_lines(nicks):
+    return ''.join(f'add_war_entry "enemy" "{nick}" "" ""\n' for nick in nicks)
+
+
+def test_append_is_parsed(tmp_path):
+    path = tmp_path / 'wars.cfg'
+    path.write_text(war_lines(f'p{i:03d}' for i in range(200)), encoding='utf-8')
+    cache = TaterParseCache()
+    before = cache.keys(path)
+    with path.open('a', encoding='utf-8') as f:
+        f.write(war_lines(['new']))
+    keys = cache.keys(path)
+    assert set(keys) == parse_existing_entries(path.read_text(encoding='utf-8'))
+    assert ('enemy', 'new', '') in keys and ('enemy', 'new', '') not in before
+
+
+def test_replaced_file_is_parsed_again(tmp_path):
+    # same head and seam bytes, grown, but a new file behind the name
+    path = tmp_path / 'wars.cfg'
+    nicks = [f'p{i:03d}' for i in range(200)]
+    path.write_text(war_lines(nicks), encoding='utf-8')
+    cache = TaterParseCache()
+    cache.keys(path)
+    nicks[10] = 'q010'
+    tmp = tmp_path / 'wars.tmp'
+    tmp.write_text(war_lines(nicks + ['new']), encoding='utf-8')
+    os.replace(str(tmp), str(path))
+    keys = cache.keys(path)
+    assert ('enemy', 'q010', '') in keys
+    assert ('enemy', 'p010', '') not in keys
+    assert ('enemy', 'new', '') in keys
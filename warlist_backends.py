@@ -0,0 +1,814 @@
+import os
+import time
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
+
+from warlist_core import (
+    STATE_MAP, CompactKeySet, append_lines, cactus_bulk_pragmas, cactus_copy, cactus_db, cactus_existing_keys,
+    cactus_has_wars, cactus_insert_new, cactus_rowid_is_key, cactus_sidecars, format_lines, fsync_dir, is_cactus_path,
+    iter_chunks, iter_existing_keys, never_cancelled, noop_progress, parse_war_entry, parse_war_line, path_lock,
+    recover_journal, check_nicks, tater_cache
+)
+
+# --- storage backends ---
+# everything that differs between a Tater cfg and a Cactus database sits
+# behind WarlistBackend, so the GUI and the CLI run one code path:
+#   load_keys()          dedup keys of everything in the file
+#   iter_rows()          every entry as a row, in file order
+#   diff(rows, seen)     split rows into (new, duplicates)
+#   apply_batch(rows)    write the new rows in chunks, record one delta;
+#                        rows may be a generator, progress then gets total 0
+#   snapshot(dest)       full copy of the file
+#   restore(src)         put a full copy back
+#   compact()            drop every entry whose key appeared earlier
+#   iter_entries()       (ref, group, nick, clan, reason) for the browser
+#   edit_entries(...)    delete, re-group or re-reason entries by ref in
+#                        one rewrite / one transaction, record one delta
+# apply_to_targets() runs apply_batch for one batch on many files at once.
+# rows are (group, nick, clan, reason) tuples. Rows repeating a key seen
+# earlier in the same run count as duplicates too.
+
+STATUS_NEW = 'new'
+STATUS_DUPLICATE = 'duplicate'
+STATUS_INVALID = 'invalid'
+
+
+def _new_result():
+    return {'added': 0, 'skipped': 0, 'skipped_entries': [], 'base': None, 'delta': None, 'cancelled': False,
+            'recovered': None}
+
+
+def _compact_result():
+    return {'removed': 0, 'size_before': 0, 'size_after': 0, 'parse_before': 0.0, 'parse_after': 0.0,
+            'base': None, 'delta': None, 'cancelled': False}
+
+
+EDIT_DELETE = 'delete'
+EDIT_GROUP = 'group'
+EDIT_REASON = 'reason'
+EDIT_ACTIONS = (EDIT_DELETE, EDIT_GROUP, EDIT_REASON)
+
+
+def _edit_result():
+    return {'changed': 0, 'skipped': 0, 'base': None, 'delta': None, 'cancelled': False}
+
+
+def _changed_since(path: Path):
+    return ValueError(f'{path.name} changed since the list was loaded, refresh it and try again')
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+class WarlistBackend(ABC):
+    cactus = False
+    uses_clans = True
+    can_optimize = False
+    default_name = ''
+    file_filter = 'All Files (*)'
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @staticmethod
+    @abstractmethod
+    def key(group, nick, clan):
+        pass
+
+    @classmethod
+    def format_lines(cls, group, entries):
+        return format_lines(group, entries, cls.cactus)
+
+    @abstractmethod
+    def load_keys(self):
+        pass
+
+    def existing_keys(self, rows):
+        # keys of rows that are already in the file; may return more
+        return self.load_keys()
+
+    @abstractmethod
+    def iter_rows(self):
+        pass
+
+    def iter_entries(self):
+        # (ref, group, nick, clan, reason) by ascending ref, the handle the
+        # browser pages by; here the entry number
+        for ref, row in enumerate(self.iter_rows()):
+            yield (ref,) + tuple(row)
+
+    def diff(self, rows, seen=None):
+        rows = list(rows)
+        existing = self.existing_keys(rows) if self.path.exists() else set()
+        return self._split(rows, existing, set() if seen is None else seen)
+
+    def _split(self, rows, existing, seen):
+        new = []
+        dups = []
+        for row in rows:
+            key = self.key(row[0], row[1], row[2])
+            if key in existing or key in seen:
+                dups.append(row)
+            else:
+                seen.add(key)
+                new.append(row)
+        return new, dups
+
+    @abstractmethod
+    def apply_batch(self, rows, store=None, chunk_size: int = 5000, progress=noop_progress,
+                    cancelled=never_cancelled, skipped_limit: int = None):
+        pass
+
+    @abstractmethod
+    def snapshot(self, dest: Path, progress=noop_progress):
+        pass
+
+    @abstractmethod
+    def restore(self, src: Path, progress=noop_progress):
+        pass
+
+    @abstractmethod
+    def compact(self, store=None, progress=noop_progress, cancelled=never_cancelled):
+        # keeps the first entry of every key, reports sizes and the time a
+        # full key load takes before and after
+        pass
+
+    @abstractmethod
+    def edit_entries(self, targets, action: str, value: str = None, store=None, progress=noop_progress,
+                     cancelled=never_cancelled):
+        # targets maps ref -> (group, nick, clan, reason) as iter_entries gave
+        # it; a file that no longer matches raises instead of hitting other
+        # entries. A re-group that would duplicate an entry of the new group
+        # is skipped.
+        pass
+
+    def sidecars(self):
+        # files next to the warlist that mean a client has it open
+        return []
+
+    def watch_files(self):
+        # files whose change means someone else wrote the warlist
+        return [self.path]
+
+    def refresh(self):
+        # bring cached state up to date after an outside write
+        pass
+
+    def take_timings(self):
+        return []
+
+
+class TaterBackend(WarlistBackend):
+    default_name = 'tclient_warlist.cfg'
+    file_filter = 'Config Files (*.cfg *.txt);;All Files (*)'
+
+    @staticmethod
+    def key(group, nick, clan):
+        return group, nick.casefold(), clan.casefold()
+
+    def load_keys(self):
+        return tater_cache.keys(self.path) if self.path.exists() else set()
+
+    def iter_rows(self):
+        if not self.path.exists():
+            return
+        with path_lock(self.path):
+            recover_journal(self.path)
+        with self.path.open(encoding='utf-8', errors='replace') as f:
+            for raw in f:
+                line = raw.strip()
+                if line.startswith('add_war_entry'):
+                    row = parse_war_entry(line)
+                    if row:
+                        yield row
+
+    def apply_batch(self, rows, store=None, chunk_size: int = 5000, progress=noop_progress,
+                    cancelled=never_cancelled, skipped_limit: int = None):
+        # all chunks of one call become a single delta, so one undo reverts it
+        result = _new_result()
+        total = len(rows) if hasattr(rows, '__len__') else 0
+        seen = set()
+        done = 0
+        offset = None
+        length = 0
+        with path_lock(self.path):
+            result['recovered'] = recover_journal(self.path)
+            # parsed once: under the lock only our own appends change the
+            # file, and those keys are in seen already
+            existing = self.load_keys()
+            try:
+                for chunk in iter_chunks(rows, chunk_size):
+                    if cancelled():
+                        result['cancelled'] = True
+                        break
+                    new, dups = self._split(chunk, existing, seen)
+                    result['skipped'] += len(dups)
+                    room = len(dups) if skipped_limit is None else skipped_limit - len(result['skipped_entries'])
+                    result['skipped_entries'].extend((nick, clan) for group, nick, clan, reason in dups[:room])
+                    if new:
+                        if store is not None and not length and store.ensure_base(progress):
+                            result['base'] = store.base_path
+                        lines = []
+                        for group, part in groupby(new, key=lambda row: row[0]):
+                            lines.extend(self.format_lines(group, [row[1:] for row in part]))
+                        at, payload = append_lines(self.path, lines)
+                        offset = at if offset is None else offset
+                        length += len(payload)
+                        result['added'] += len(new)
+                    done += len(chunk)
+                    progress(done, total)
+            finally:
+                if store is not None and length:
+                    result['delta'] = store.record_append(offset, length, result['added'])
+        return result
+
+    def compact(self, store=None, progress=noop_progress, cancelled=never_cancelled):
+        # one streaming pass into a temp file; other lines keep their place
+        result = _compact_result()
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with path_lock(self.path):
+            recover_journal(self.path)
+            result['size_before'] = result['size_after'] = total = self.path.stat().st_size
+            result['parse_before'] = result['parse_after'] = _timed(self._parse)
+            seen = set()
+            ranges = []
+            removed = []
+            offset = 0
+            try:
+                with self.path.open('rb') as src, tmp.open('wb') as dst:
+                    for lineno, raw in enumerate(src):
+                        if lineno % 10000 == 0:
+                            if cancelled():
+                                result['cancelled'] = True
+                                break
+                            progress(offset, total)
+                        key = None
+                        line = raw.strip()
+                        if line.startswith(b'add_war_entry'):
+                            parsed = parse_war_line(line.decode('utf-8', errors='replace'))
+                            if parsed:
+                                key = (parsed[0], parsed[1].casefold(), parsed[2].casefold())
+                        if key is not None and key in seen:
+                            ranges.append((offset, len(raw)))
+                            removed.append(raw)
+                        else:
+                            if key is not None:
+                                seen.add(key)
+                            dst.write(raw)
+                        offset += len(raw)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                if result['cancelled'] or not ranges:
+                    return result
+                if store is not None and store.ensure_base(progress):
+                    result['base'] = store.base_path
+                os.replace(str(tmp), str(self.path))
+                fsync_dir(self.path)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            tater_cache.invalidate(self.path)
+            result['removed'] = len(ranges)
+            result['size_after'] = self.path.stat().st_size
+            result['parse_after'] = _timed(self._parse)
+            if store is not None:
+                result['delta'] = store.record_cut(ranges, b''.join(removed), result['size_after'])
+        progress(total, total)
+        return result
+
+    def edit_entries(self, targets, action: str, value: str = None, store=None, progress=noop_progress,
+                     cancelled=never_cancelled):
+        # one streaming pass into a temp file swapped in with os.replace,
+        # however many entries change; refs are entry numbers
+        result = _edit_result()
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with path_lock(self.path):
+            recover_journal(self.path)
+            total = self.path.stat().st_size
+            # the cached keys are shared and read-only; moves go to a set
+            taken = (self.load_keys(), set()) if action == EDIT_GROUP else None
+            ranges = []
+            old = []
+            new = []
+            offset = 0
+            ref = -1
+            found = 0
+            try:
+                with self.path.open('rb') as src, tmp.open('wb') as dst:
+                    for lineno, raw in enumerate(src):
+                        if lineno % 10000 == 0:
+                            if cancelled():
+                                result['cancelled'] = True
+                                break
+                            progress(offset, total)
+                        line = raw.strip()
+                        row = None
+                        if line.startswith(b'add_war_entry'):
+                            row = parse_war_entry(line.decode('utf-8', errors='replace'))
+                            if row:
+                                ref += 1
+                        expected = targets.get(ref) if row else None
+                        replacement = None
+                        if expected is not None:
+                            found += 1
+                            if tuple(row) != tuple(expected):
+                                raise _changed_since(self.path)
+                            replacement = self._edited_line(raw, row, action, value, taken, result)
+                        if replacement is None:
+                            dst.write(raw)
+                        else:
+                            ranges.append((offset, len(raw), len(replacement)))
+                            old.append(raw)
+                            new.append(replacement)
+                            dst.write(replacement)
+                        offset += len(raw)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                if result['cancelled']:
+                    return result
+                # refs past the end of a shrunk file are missing too
+                if found < len(targets):
+                    raise _changed_since(self.path)
+                if not ranges:
+                    return result
+                if store is not None and store.ensure_base(progress):
+                    result['base'] = store.base_path
+                os.replace(str(tmp), str(self.path))
+                fsync_dir(self.path)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            tater_cache.invalidate(self.path)
+            result['changed'] = len(ranges)
+            if store is not None:
+                if action == EDIT_DELETE:
+                    result['delta'] = store.record_cut([r[:2] for r in ranges], b''.join(old),
+                                                       self.path.stat().st_size)
+                else:
+                    result['delta'] = store.record_edit(ranges, b''.join(old), b''.join(new))
+        progress(total, total)
+        return result
+
+    @staticmethod
+    def _edited_line(raw: bytes, row, action: str, value: str, taken, result):
+        # the new bytes of a line, b'' to drop it, None to leave it alone
+        group, nick, clan, reason = row
+        if action == EDIT_DELETE:
+            return b''
+        if action == EDIT_GROUP:
+            key = (value, nick.casefold(), clan.casefold())
+            if value == group:
+                return None
+            existing, moved = taken
+            if key in existing or key in moved:
+                result['skipped'] += 1
+                return None
+            moved.add(key)
+            group = value
+        elif value == reason:
+            return None
+        else:
+            reason = value
+        eol = raw[len(raw.rstrip(b'\r\n')):]
+        return format_lines(group, [(nick, clan, reason)], False)[0].encode('utf-8') + eol
+
+    def refresh(self):
+        # an append is parsed incrementally, a rewrite from scratch
+        if self.path.exists():
+            tater_cache.keys(self.path)
+
+    def _parse(self):
+        # a cold parse, the cost every client start and cache miss pays
+        CompactKeySet(iter_existing_keys(self.path.read_text(encoding='utf-8', errors='replace')))
+
+    def snapshot(self, dest: Path, progress=noop_progress):
+        import shutil
+        shutil.copy2(self.path, dest)
+
+    def restore(self, src: Path, progress=noop_progress):
+        import shutil
+        with path_lock(self.path):
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            shutil.copy2(src, tmp)
+            os.replace(str(tmp), str(self.path))
+            tater_cache.invalidate(self.path)
+
+
+class CactusBackend(WarlistBackend):
+    # Cactus has no clans; a nick is unique per state
+    cactus = True
+    uses_clans = False
+    can_optimize = True
+    default_name = 'cactus.sqlite3'
+    file_filter = 'SQLite DB (*.sqlite3 *.db *.sqlite);;All Files (*)'
+
+    @staticmethod
+    def key(group, nick, clan):
+        return group, nick.casefold()
+
+    def load_keys(self):
+        if not self.path.exists():
+            return set()
+        groups = {state: group for group, state in STATE_MAP.items()}
+        with cactus_db.connection(self.path) as conn:
+            if not cactus_has_wars(conn):
+                return set()
+            return {(groups[state], name) for state, name in
+                    conn.execute("SELECT state, lower(name) FROM wars WHERE lower(name) IS NOT NULL")
+                    if state in groups}
+
+    def iter_rows(self):
+        # group is None for states outside STATE_MAP
+        if not self.path.exists():
+            return
+        groups = {state: group for group, state in STATE_MAP.items()}
+        with cactus_db.connection(self.path) as conn:
+            if not cactus_has_wars(conn):
+                return
+            rows = conn.execute("SELECT state, name, reason FROM wars WHERE name IS NOT NULL ORDER BY rowid").fetchall()
+        for state, name, reason in rows:
+            yield groups.get(state), name, '', reason or ''
+
+    def iter_entries(self):
+        # streamed by rowid; states outside STATE_MAP show up as their number
+        if not self.path.exists():
+            return
+        groups = {state: group for group, state in STATE_MAP.items()}
+        with cactus_db.connection(self.path) as conn:
+            if not cactus_has_wars(conn):
+                return
+            for rowid, state, name, reason in conn.execute(
+                    "SELECT rowid, state, name, reason FROM wars WHERE name IS NOT NULL ORDER BY rowid"):
+                yield rowid, groups.get(state, str(state)), name, '', reason or ''
+
+    def existing_keys(self, rows):
+        # probe only the keys of this batch instead of loading the table
+        by_group = {}
+        for group, nick, clan, reason in rows:
+            by_group.setdefault(group, set()).add(nick.casefold())
+        found = set()
+        with cactus_db.connection(self.path) as conn:
+            if not cactus_has_wars(conn):
+                return found
+            for group, keys in by_group.items():
+                found.update((group, key) for key in cactus_existing_keys(conn, keys, STATE_MAP.get(group, 1)))
+        return found
+
+    def apply_batch(self, rows, store=None, chunk_size: int = 5000, progress=noop_progress,
+                    cancelled=never_cancelled, skipped_limit: int = None):
+        # duplicates are resolved inside each insert transaction, so
+        # skipped_entries stays empty and only the count is reported
+        result = _new_result()
+        total = len(rows) if hasattr(rows, '__len__') else 0
+        inserted_rows = [] if store is not None else None
+        done = 0
+        with path_lock(self.path), cactus_db.connection(self.path, create=True) as conn:
+            if store is not None and store.ensure_base(progress):
+                result['base'] = store.base_path
+            try:
+                with cactus_bulk_pragmas(conn):
+                    for chunk in iter_chunks(rows, chunk_size):
+                        if cancelled():
+                            result['cancelled'] = True
+                            break
+                        by_state = {}
+                        for group, nick, clan, reason in chunk:
+                            by_state.setdefault(STATE_MAP.get(group, 1), []).append((nick, reason))
+                        for state, pairs in by_state.items():
+                            inserted, skipped = cactus_insert_new(conn, pairs, state, inserted_rows)
+                            result['added'] += inserted
+                            result['skipped'] += skipped
+                        done += len(chunk)
+                        progress(done, total)
+            finally:
+                if inserted_rows:
+                    result['delta'] = store.record_rows(inserted_rows)
+        return result
+
+    def compact(self, store=None, progress=noop_progress, cancelled=never_cancelled):
+        # the lowest id of every (state, name.casefold()) stays - SQLite's
+        # lower() only folds ASCII, so the keys are built here while the
+        # table streams by rowid. The deletes share one transaction and
+        # VACUUM then gives the pages back - unless the rowid is not a
+        # declared key, since VACUUM may renumber it under the undo history
+        import sqlite3
+        result = _compact_result()
+        with path_lock(self.path), cactus_db.connection(self.path) as conn:
+            if not cactus_has_wars(conn):
+                return result
+            result['size_before'] = result['size_after'] = self._db_size(conn)
+            result['parse_before'] = result['parse_after'] = _timed(self.load_keys)
+            seen = set()
+            rows = []
+            for row in conn.execute("SELECT rowid, name, state, reason FROM wars WHERE name IS NOT NULL "
+                                    "ORDER BY rowid"):
+                key = (row[2], row[1].casefold())
+                if key in seen:
+                    rows.append(row)
+                else:
+                    seen.add(key)
+            del seen
+            conn.rollback()
+            if not rows or cancelled():
+                result['cancelled'] = bool(rows)
+                return result
+            if store is not None and store.ensure_base(progress):
+                result['base'] = store.base_path
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                done = 0
+                for chunk in iter_chunks((row[0] for row in rows), 500):
+                    conn.execute("DELETE FROM wars WHERE rowid IN (" + ','.join('?' * len(chunk)) + ")", chunk)
+                    done += len(chunk)
+                    progress(done, len(rows))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            result['removed'] = len(rows)
+            if store is not None:
+                result['delta'] = store.record_rows(rows, kind='delete')
+            if cactus_rowid_is_key(conn):
+                try:
+                    conn.execute("VACUUM")
+                except sqlite3.OperationalError:
+                    # busy: another client holds the database, the free
+                    # pages are reused by later inserts instead
+                    pass
+            result['size_after'] = self._db_size(conn)
+            result['parse_after'] = _timed(self.load_keys)
+        return result
+
+    def edit_entries(self, targets, action: str, value: str = None, store=None, progress=noop_progress,
+                     cancelled=never_cancelled):
+        # refs are rowids; all changes share one DELETE / UPDATE ... WHERE
+        # rowid IN (...) transaction. Nicks are matched by casefold like in
+        # compact, SQLite's lower() only folds ASCII
+        result = _edit_result()
+        ids = sorted(targets)
+        groups = {state: group for group, state in STATE_MAP.items()}
+        with path_lock(self.path), cactus_db.connection(self.path) as conn:
+            if not cactus_has_wars(conn):
+                raise _changed_since(self.path)
+            rows = []
+            for chunk in iter_chunks(ids, 500):
+                rows.extend(conn.execute("SELECT rowid, name, state, reason FROM wars WHERE rowid IN ("
+                                         + ','.join('?' * len(chunk)) + ") ORDER BY rowid", chunk))
+            # the row must still be the one listed: nick, group and reason
+            if len(rows) < len(ids) or any(
+                    (groups.get(state, str(state)), name, reason or '') != tuple(targets[rowid][i] for i in (0, 1, 3))
+                    for rowid, name, state, reason in rows):
+                conn.rollback()
+                raise _changed_since(self.path)
+            if action == EDIT_GROUP:
+                state = STATE_MAP[value]
+                wanted = {row[1].casefold() for row in rows if row[2] != state}
+                taken = set()
+                if wanted:
+                    for (name,) in conn.execute("SELECT name FROM wars WHERE state=? AND name IS NOT NULL", (state,)):
+                        key = name.casefold()
+                        if key in wanted:
+                            taken.add(key)
+                changed = []
+                for row in rows:
+                    if row[2] == state:
+                        continue
+                    key = row[1].casefold()
+                    if key in taken:
+                        result['skipped'] += 1
+                        continue
+                    taken.add(key)
+                    changed.append(row)
+                sql, param = "UPDATE wars SET state=? WHERE rowid IN ", state
+            elif action == EDIT_REASON:
+                changed = [row for row in rows if (row[3] or '') != value]
+                sql, param = "UPDATE wars SET reason=? WHERE rowid IN ", value
+            else:
+                changed = rows
+                sql, param = "DELETE FROM wars WHERE rowid IN ", None
+            conn.rollback()
+            if not changed or cancelled():
+                result['cancelled'] = bool(changed)
+                return result
+            if store is not None and store.ensure_base(progress):
+                result['base'] = store.base_path
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                done = 0
+                for chunk in iter_chunks([row[0] for row in changed], 500):
+                    params = chunk if param is None else [param] + chunk
+                    conn.execute(sql + "(" + ','.join('?' * len(chunk)) + ")", params)
+                    done += len(chunk)
+                    progress(done, len(changed))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            result['changed'] = len(changed)
+            if store is not None:
+                before = [row[:4] for row in changed]
+                if action == EDIT_DELETE:
+                    result['delta'] = store.record_rows(before, kind='delete')
+                else:
+                    after = [(rowid, name, param, reason) if action == EDIT_GROUP else (rowid, name, state, param)
+                             for rowid, name, state, reason in before]
+                    result['delta'] = store.record_update(before, after)
+        return result
+
+    @staticmethod
+    def _db_size(conn) -> int:
+        return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+    def snapshot(self, dest: Path, progress=noop_progress):
+        # a crashed earlier attempt may have left a half-built DB at dest
+        dest = Path(dest)
+        for p in [dest] + cactus_sidecars(dest):
+            if p.exists():
+                p.unlink()
+        cactus_copy(self.path, dest, progress)
+
+    def restore(self, src: Path, progress=noop_progress):
+        # in place through SQLite, so the file's -wal is never paired with
+        # foreign pages
+        with path_lock(self.path):
+            cactus_copy(src, self.path, progress)
+            cactus_db.invalidate(self.path)
+
+    def sidecars(self):
+        return cactus_sidecars(self.path)
+
+    def watch_files(self):
+        # a client in WAL mode only touches the -wal file until a checkpoint
+        return [self.path, self.path.with_name(self.path.name + '-wal')]
+
+    def refresh(self):
+        # the handle reopens by itself when the file was replaced
+        cactus_db.invalidate(self.path)
+
+    def take_timings(self):
+        return cactus_db.take_timings(self.path)
+
+
+BACKENDS = {'tater': TaterBackend, 'cactus': CactusBackend}
+
+
+def open_backend(path: Path, cactus: bool = None) -> WarlistBackend:
+    # cactus=None picks the backend by file extension
+    if cactus is None:
+        cactus = is_cactus_path(path)
+    return (CactusBackend if cactus else TaterBackend)(path)
+
+
+def classify_entries(backend, group: str, entries):
+    # preview rows (nick, clan, reason, group, status); backend may be None
+    # when no file is chosen, and lookup errors only cost the duplicate
+    # column, like the old preview
+    rows = [(group, nick, clan, reason) for nick, clan, reason in entries]
+    problems = check_nicks((row[1] for row in rows), allow_empty=True)
+    valid = [row for row, problem in zip(rows, problems) if problem is None]
+    dups = set()
+    if backend is not None:
+        try:
+            dups = {id(row) for row in backend.diff(valid)[1]}
+        except Exception:
+            dups = set()
+    result = []
+    for row, problem in zip(rows, problems):
+        group, nick, clan, reason = row
+        if problem:
+            status = STATUS_INVALID
+        elif id(row) in dups:
+            status = STATUS_DUPLICATE
+        else:
+            status = STATUS_NEW
+        result.append((nick, clan, reason, group, status))
+    return result
+
+
+def _sync_key(source, target):
+    # entries match on what both sides can store: a Cactus side has no clans
+    if source.cactus or target.cactus:
+        return CactusBackend.key
+    return target.key
+
+
+def _sync_delta(rows, target_keys, key, to_cactus: bool, stats):
+    # rows missing from target_keys, mapped to what the target can hold
+    seen = set()
+    delta = []
+    for group, nick, clan, reason in rows:
+        if group is None or (to_cactus and group not in STATE_MAP):
+            # unknown Cactus states, and Tater groups with no state
+            stats['unmapped'] += 1
+            continue
+        if to_cactus and not nick:
+            stats['clan_only'] += 1
+            continue
+        k = key(group, nick, clan)
+        if k in target_keys or k in seen:
+            continue
+        seen.add(k)
+        if to_cactus and clan:
+            stats['clan_dropped'] += 1
+            clan = ''
+        delta.append((group, nick, clan, reason))
+    return delta
+
+
+def sync_backends(source, target, both: bool = False, source_store=None, target_store=None, dry_run: bool = False,
+                  progress=noop_progress, cancelled=never_cancelled):
+    # copies the entries of source that target lacks, and with both=True
+    # the other way round too. Both deltas come from the key sets as they
+    # were before either write, so nothing written by the sync is synced
+    # back. Groups map to Cactus states through STATE_MAP; what a Cactus
+    # target cannot hold is counted instead of written:
+    #   clan_dropped  entries written without their clan
+    #   clan_only     clan entries without a nick, skipped
+    #   unmapped      groups or states outside STATE_MAP, skipped
+    key = _sync_key(source, target)
+    stats = {'clan_dropped': 0, 'clan_only': 0, 'unmapped': 0}
+    source_rows = list(source.iter_rows())
+    target_rows = list(target.iter_rows())
+    source_keys = {key(g, n, c) for g, n, c, r in source_rows if g is not None}
+    target_keys = {key(g, n, c) for g, n, c, r in target_rows if g is not None}
+    result = {'forward': _sync_delta(source_rows, target_keys, key, target.cactus, stats),
+              'backward': _sync_delta(target_rows, source_keys, key, source.cactus, stats) if both else [],
+              'stats': stats, 'source_total': len(source_rows), 'target_total': len(target_rows),
+              'applied': {}}
+    del source_rows, target_rows
+    if dry_run:
+        return result
+    steps = [('forward', target, target_store)]
+    if both:
+        steps.append(('backward', source, source_store))
+    for name, backend, store in steps:
+        if result[name] and not cancelled():
+            result['applied'][name] = backend.apply_batch(result[name], store=store, progress=progress,
+                                                          cancelled=cancelled, skipped_limit=0)
+    return result
+
+
+def _target_key(path: Path) -> str:
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+def apply_to_targets(targets, rows, store_for=None, workers: int = None, progress=noop_progress,
+                     cancelled=never_cancelled):
+    # writes the same validated rows to several warlists at once, one
+    # apply_batch per target on a thread pool. Every target takes its own
+    # path lock and store (store_for(backend) -> BackupStore or None); a
+    # failing target is reported without stopping the others. Cactus
+    # targets share one copy of the rows without clan-only entries.
+    # Threads, not processes: path locks and database handles are per
+    # process. SQLite work runs outside the GIL and spreads over the cores;
+    # the cfg key parse does not, so cfg targets mainly overlap their disk
+    # reads and writes.
+    # Returns [{'path', 'cactus', 'error', 'seconds', 'clan_only', 'timings',
+    # **apply_batch result}] in target order; a path listed twice is
+    # written once.
+    rows = list(rows)
+    unique = {}
+    for backend in targets:
+        unique.setdefault(_target_key(backend.path), backend)
+    targets = list(unique.values())
+    nick_rows = [row for row in rows if row[1]] if any(b.cactus for b in targets) else rows
+    total = sum(len(nick_rows if b.cactus else rows) for b in targets)
+    done = {}
+    guard = threading.Lock()
+
+    def run(backend):
+        result = _new_result()
+        result.update(path=backend.path, cactus=backend.cactus, error=None, seconds=0.0,
+                      clan_only=len(rows) - len(nick_rows) if backend.cactus else 0, timings=[])
+        key = _target_key(backend.path)
+
+        def step(count, _total):
+            with guard:
+                done[key] = count
+                progress(sum(done.values()), total)
+
+        started = time.perf_counter()
+        try:
+            store = store_for(backend) if store_for is not None else None
+            # the base copy is taken here, quietly: its progress counts
+            # database pages, which must not mix with the rows in step
+            base = store.base_path if store is not None and store.ensure_base() else None
+            result.update(backend.apply_batch(nick_rows if backend.cactus else rows, store=store, progress=step,
+                                              cancelled=cancelled, skipped_limit=0))
+            result['base'] = result['base'] or base
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+        result['seconds'] = time.perf_counter() - started
+        result['timings'] = backend.take_timings()
+        return result
+
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=workers or min(len(targets), os.cpu_count() or 1)) as pool:
+        return list(pool.map(run, targets))
@@ -0,0 +1,615 @@
+import os
+import json
+from pathlib import Path
+from datetime import datetime
+
+from warlist_core import (
+    BackupConflictError, BackupError, append_bytes, cactus_db, fsync_dir, journal_path, noop_progress, path_lock,
+    recover_journal, tater_cache, write_durable
+)
+from warlist_backends import open_backend
+
+# --- backup store ---
+# <file>.backups/ holds one full snapshot of the warlist (base) plus one
+# small delta per write:
+#   append - Tater: the bytes appended at offset, reverted by cutting them out
+#   rows   - Cactus: the inserted (rowid, name, state, reason), reverted by
+#            DELETE ... WHERE rowid IN (...)
+#   cut    - Tater: byte ranges removed from the file (compaction), with
+#            the removed bytes as payload; reverted by splicing them back
+#   delete - Cactus: the deleted rows, reverted by inserting them again
+#   edit   - Tater: lines rewritten in place (re-group, new reason), with
+#            (offset, old length, new length) ranges and the old then the
+#            new bytes as payload; reverted by swapping them back
+#   update - Cactus: the changed rows before and after, reverted by
+#            writing the old values back
+#   sql    - schema changes, with the statements that undo them
+# A delta file is a JSON header line followed by the raw payload.
+#
+# catalog.json indexes the deltas: one entry per write (seq, time, kind,
+# entry count, offset/length, delta file, size) and a cursor. Entries before
+# the cursor are applied, the rest can be redone; a new write drops them.
+# base_seq is the seq of the first write on top of the base: the base is
+# taken before a write unless one leading up to it exists already, a file
+# that does not exist yet gets an empty base, and when pruning drops the
+# write right after the base its delta is applied to the base, so
+# restore_base always lands on a state the catalog can redo from.
+# The catalog is only ever replaced atomically. A delta file is written
+# before its catalog entry, so a crash in between leaves an orphan that is
+# never listed and gets overwritten by the next write. Undo and redo note
+# the step as pending in the catalog before touching the warlist and settle
+# it on the next load if the process died half way.
+
+BACKUP_DIR_SUFFIX = '.backups'
+CATALOG_NAME = 'catalog.json'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_DELTAS = 200
+_SQL_CHUNK = 500
+REMOVING_KINDS = ('cut', 'delete')
+CHANGING_KINDS = ('edit', 'update')
+
+
+def backup_dir(path: Path) -> Path:
+    return path.with_name(path.name + BACKUP_DIR_SUFFIX)
+
+
+def _empty_catalog():
+    return {'version': 1, 'cursor': 0, 'next_seq': 1, 'entries': [], 'base_seq': None}
+
+
+class BackupStore:
+    # cactus is the client the caller chose for the file; None guesses it
+    # from the extension like open_backend does
+    def __init__(self, path: Path, cactus: bool = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_deltas: int = DEFAULT_MAX_DELTAS):
+        self.path = Path(path)
+        self.dir = backup_dir(self.path)
+        self.backend = open_backend(self.path, cactus)
+        self.max_bytes = max_bytes
+        self.max_deltas = max_deltas
+
+    @classmethod
+    def for_backend(cls, backend):
+        return cls(backend.path, backend.cactus)
+
+    @property
+    def base_path(self) -> Path:
+        return self.dir / ('base' + self.path.suffix)
+
+    @property
+    def catalog_path(self) -> Path:
+        return self.dir / CATALOG_NAME
+
+    def ensure_base(self, progress=noop_progress) -> bool:
+        # full copy of the file before the coming write, unless the base
+        # already leads up to it; returns True if it was taken now
+        with path_lock(self.path):
+            cat = self._load()
+            index = self._base_index(cat)
+            if index is not None and index <= cat['cursor']:
+                return False
+            try:
+                self.dir.mkdir(parents=True, exist_ok=True)
+                tmp = self.base_path.with_name(self.base_path.name + '.tmp')
+                if self.path.exists():
+                    self.backend.snapshot(tmp, progress)
+                else:
+                    # no file yet: an empty cfg or database is the same list
+                    write_durable(tmp, b'')
+                os.replace(str(tmp), str(self.base_path))
+                fsync_dir(self.base_path)
+            except Exception as e:
+                raise BackupError(str(e))
+            cat['base_seq'] = cat['next_seq']
+            self._save(cat)
+            return True
+
+    def _base_index(self, cat):
+        # position in the catalog the base stands for (0 = before the
+        # oldest write), or None without a usable base
+        seq = cat.get('base_seq')
+        if seq is None or not self.base_path.exists():
+            return None
+        for i, entry in enumerate(cat['entries']):
+            if entry['seq'] == seq:
+                return i
+        return len(cat['entries']) if seq == cat['next_seq'] else None
+
+    def has_base(self) -> bool:
+        return self._base_index(self._read_catalog()) is not None
+
+    # --- catalog ---
+
+    def _read_catalog(self):
+        try:
+            return json.loads(self.catalog_path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return _empty_catalog()
+        except ValueError:
+            # writes are atomic, so only a foreign edit gets here
+            return _empty_catalog()
+
+    def _save(self, cat):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.catalog_path.with_name(CATALOG_NAME + '.tmp')
+        write_durable(tmp, json.dumps(cat, indent=1).encode('utf-8'))
+        os.replace(str(tmp), str(self.catalog_path))
+        fsync_dir(self.catalog_path)
+
+    def _load(self):
+        cat = self._read_catalog()
+        pending = cat.pop('pending', None)
+        if pending:
+            index = next((i for i, e in enumerate(cat['entries']) if e['seq'] == pending['seq']), None)
+            if index is not None:
+                entry = cat['entries'][index]
+                if pending['op'] == 'undo':
+                    self._revert(entry, settle=True)
+                    cat['cursor'] = index
+                else:
+                    self._apply(entry, pending.get('offset'))
+                    cat['cursor'] = index + 1
+            self._save(cat)
+        return cat
+
+    def history(self):
+        # catalog entries, oldest first, each with an 'applied' flag
+        cat = self._read_catalog()
+        return [dict(entry, applied=i < cat['cursor']) for i, entry in enumerate(cat['entries'])]
+
+    def describe(self, entry) -> str:
+        state = '' if entry.get('applied', True) else ' [undone]'
+        sign = '-' if entry['kind'] in REMOVING_KINDS else '~' if entry['kind'] in CHANGING_KINDS else '+'
+        return f"#{entry['seq']} {entry['time']} {entry['kind']} {sign}{entry['entries']}{state}"
+
+    # --- recording ---
+
+    def _record(self, meta: dict, payload: bytes = b'', source=None):
+        with path_lock(self.path):
+            cat = self._load()
+            seq = cat['next_seq']
+            meta['time'] = datetime.now().isoformat(timespec='seconds')
+            name = f'{seq:06d}.delta'
+            _write_delta_file(self.dir / name, meta, payload, source)
+            base = self._base_index(cat)
+            if base is not None and base >= cat['cursor']:
+                # the base stood before a write this one replaces: it is
+                # the state at the cursor, or of a dropped branch
+                if base == cat['cursor']:
+                    cat['base_seq'] = seq
+                else:
+                    self._drop_base(cat)
+            for entry in cat['entries'][cat['cursor']:]:
+                self._unlink(entry)
+            entry = {'seq': seq, 'time': meta['time'], 'kind': meta['kind'], 'entries': meta['entries'],
+                     'offset': meta.get('offset'), 'length': meta.get('length'), 'file': name,
+                     'size': (self.dir / name).stat().st_size}
+            cat['entries'] = cat['entries'][:cat['cursor']] + [entry]
+            cat['cursor'] = len(cat['entries'])
+            cat['next_seq'] = seq + 1
+            self._prune(cat)
+            self._save(cat)
+            return entry
+
+    def record_append(self, offset: int, length: int, entries: int):
+        # the payload is copied from the warlist itself, so a large import
+        # never holds its appended bytes in memory
+        return self._record({'kind': 'append', 'offset': offset, 'length': length, 'entries': entries},
+                            source=(self.path, offset, length))
+
+    def record_rows(self, rows, kind: str = 'rows'):
+        # kind 'rows' for inserted rows, 'delete' for deleted ones
+        rows = [list(r) for r in rows]
+        return self._record({'kind': kind, 'rows': rows, 'entries': len(rows)})
+
+    def record_cut(self, ranges, payload: bytes, size: int):
+        # ranges are (offset, length) in the file before the cut, payload
+        # their bytes in order, size the file size after it
+        return self._record({'kind': 'cut', 'ranges': [list(r) for r in ranges], 'size': size,
+                             'entries': len(ranges)}, payload)
+
+    def record_edit(self, ranges, old: bytes, new: bytes):
+        # ranges are (offset, old length, new length) in the file before the
+        # edit, old and new the bytes of all ranges before and after it
+        return self._record({'kind': 'edit', 'ranges': [list(r) for r in ranges], 'split': len(old),
+                             'entries': len(ranges)}, old + new)
+
+    def record_update(self, before, after):
+        # (rowid, name, state, reason) of the changed rows, old and new
+        return self._record({'kind': 'update', 'rows': [list(r) for r in before], 'after': [list(r) for r in after],
+                             'entries': len(before)})
+
+    def record_sql(self, apply, revert):
+        return self._record({'kind': 'sql', 'apply': list(apply), 'revert': list(revert), 'entries': 0})
+
+    def delta_path(self, entry) -> Path:
+        return self.dir / entry['file']
+
+    def _read_delta(self, entry):
+        header, _, payload = self.delta_path(entry).read_bytes().partition(b'\n')
+        return json.loads(header.decode('utf-8')), payload
+
+    def _unlink(self, entry):
+        try:
+            self.delta_path(entry).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _prune(self, cat):
+        # drop the oldest entries until the cap, which counts the base too,
+        # holds; the newest write is always kept. A dropped write the base
+        # stood before is applied to the base first
+        entries = cat['entries']
+        total = sum(e['size'] for e in entries) + self._base_size(cat)
+        while len(entries) > 1 and (len(entries) > self.max_deltas or total > self.max_bytes):
+            if self._base_index(cat) == 0:
+                total -= self._base_size(cat)
+                self._roll_base(cat, entries[0])
+                total += self._base_size(cat)
+            entry = entries.pop(0)
+            total -= entry['size']
+            self._unlink(entry)
+            cat['cursor'] = max(cat['cursor'] - 1, 0)
+
+    def _base_size(self, cat) -> int:
+        return self.base_path.stat().st_size if self._base_index(cat) is not None else 0
+
+    def _roll_base(self, cat, entry):
+        # redo entry on the base copy: a store on the base path that reads
+        # this store's delta files
+        replay = BackupStore(self.base_path, self.backend.cactus)
+        replay.dir = self.dir
+        try:
+            replay._apply(dict(entry))
+            cat['base_seq'] = cat['entries'][1]['seq']
+        except Exception:
+            # a base that cannot follow is no base at all
+            self._drop_base(cat)
+        finally:
+            if replay.backend.cactus:
+                cactus_db.close(self.base_path)
+            for p in (journal_path(self.base_path), self.base_path.with_name(self.base_path.name + '.tmp')):
+                if p.exists():
+                    p.unlink()
+
+    def _drop_base(self, cat):
+        cat['base_seq'] = None
+        if self.base_path.exists():
+            self.base_path.unlink()
+
+    # --- undo / redo ---
+
+    def undo(self, steps: int = 1):
+        # reverts up to steps applied writes, newest first; returns them
+        done = []
+        with path_lock(self.path):
+            cat = self._load()
+            while len(done) < steps and cat['cursor'] > 0:
+                entry = cat['entries'][cat['cursor'] - 1]
+                cat['pending'] = {'op': 'undo', 'seq': entry['seq']}
+                self._save(cat)
+                self._run_step(cat, self._revert, entry)
+                cat['cursor'] -= 1
+                self._save(cat)
+                done.append(entry)
+        return done
+
+    def redo(self, steps: int = 1):
+        # re-applies up to steps undone writes, oldest first; returns them
+        done = []
+        with path_lock(self.path):
+            cat = self._load()
+            while len(done) < steps and cat['cursor'] < len(cat['entries']):
+                entry = cat['entries'][cat['cursor']]
+                pending = {'op': 'redo', 'seq': entry['seq']}
+                if entry['kind'] == 'append':
+                    recover_journal(self.path)
+                    pending['offset'] = self.path.stat().st_size if self.path.exists() else 0
+                cat['pending'] = pending
+                self._save(cat)
+                self._run_step(cat, self._apply, entry, pending.get('offset'))
+                cat['cursor'] += 1
+                self._save(cat)
+                done.append(entry)
+        return done
+
+    def _run_step(self, cat, fn, *args):
+        # a step that failed cleanly (e.g. the file changed) is not pending
+        try:
+            fn(*args)
+        except Exception:
+            del cat['pending']
+            self._save(cat)
+            raise
+        del cat['pending']
+
+    def restore_base(self, progress=noop_progress):
+        # puts the base snapshot back: the file as it was before the oldest
+        # write still listed, which stay available for redo. Returns the
+        # writes this reverted, newest first
+        with path_lock(self.path):
+            cat = self._load()
+            index = self._base_index(cat)
+            if index is None:
+                raise ValueError(f'{self.path.name} has no base snapshot to restore')
+            recover_journal(self.path)
+            self.backend.restore(self.base_path, progress)
+            reverted = cat['entries'][index:cat['cursor']][::-1]
+            cat['cursor'] = index
+            self._save(cat)
+            return reverted
+
+    def _revert(self, entry, settle: bool = False):
+        meta, payload = self._read_delta(entry)
+        if entry['kind'] == 'append':
+            recover_journal(self.path)
+            self._cut(entry['offset'], payload, settle)
+        elif entry['kind'] == 'cut':
+            recover_journal(self.path)
+            self._splice(meta, payload, settle)
+        elif entry['kind'] == 'edit':
+            recover_journal(self.path)
+            self._swap(meta, payload, forward=False, settle=settle)
+        elif entry['kind'] == 'rows':
+            self._delete_rows(meta['rows'])
+        elif entry['kind'] == 'delete':
+            self._insert_rows(meta['rows'])
+        elif entry['kind'] == 'update':
+            self._update_rows(meta['rows'], meta['after'])
+        else:
+            self._execute([(sql, ()) for sql in meta['revert']])
+
+    def _apply(self, entry, offset=None):
+        # offset is where a redone append is expected to land; when the
+        # payload is already there the append is not repeated
+        meta, payload = self._read_delta(entry)
+        if entry['kind'] == 'append':
+            recover_journal(self.path)
+            if offset is None or not self._has_payload(offset, payload):
+                offset = append_bytes(self.path, payload)
+            entry['offset'] = offset
+            tater_cache.invalidate(self.path)
+        elif entry['kind'] == 'cut':
+            recover_journal(self.path)
+            if self._has_ranges(meta['ranges'], payload):
+                self._rewrite(meta['ranges'], payload, remove=True)
+        elif entry['kind'] == 'edit':
+            recover_journal(self.path)
+            self._swap(meta, payload, forward=True, settle=True)
+        elif entry['kind'] == 'rows':
+            self._insert_rows(meta['rows'])
+        elif entry['kind'] == 'delete':
+            self._delete_rows(meta['rows'])
+        elif entry['kind'] == 'update':
+            self._update_rows(meta['after'], meta['rows'])
+        else:
+            self._execute([(sql, ()) for sql in meta['apply']])
+
+    def _insert_rows(self, rows):
+        # rows already back with the same values are left alone (a settled
+        # step); a rowid holding anything else means the database changed
+        current = self._current_rows([row[0] for row in rows])
+        self._check_rows(current, rows, missing_ok=True)
+        self._execute([("INSERT INTO wars (rowid, name, state, reason) VALUES (?, ?, ?, ?)", row)
+                       for row in rows if row[0] not in current])
+
+    def _delete_rows(self, rows):
+        # only rowids that still hold the recorded row; gone ones are fine
+        current = self._current_rows([row[0] for row in rows])
+        self._check_rows(current, rows, missing_ok=True)
+        ids = [row[0] for row in rows if row[0] in current]
+        self._execute([("DELETE FROM wars WHERE rowid IN (" + ','.join('?' * len(part)) + ")", part)
+                       for part in _parts(ids)])
+
+    def _update_rows(self, rows, expected):
+        # writes rows over expected; rows already in place count as a
+        # settled step
+        current = self._current_rows([row[0] for row in rows])
+        done = {row[0]: tuple(row[1:]) for row in rows}
+        self._check_rows(current, [row for row in expected if current.get(row[0]) != done[row[0]]])
+        self._execute([("UPDATE wars SET name=?, state=?, reason=? WHERE rowid=?", (name, state, reason, rowid))
+                       for rowid, name, state, reason in rows])
+
+    def _current_rows(self, ids):
+        # {rowid: (name, state, reason)} of the rowids still in the table
+        current = {}
+        with cactus_db.connection(self.path, create=True) as conn:
+            for part in _parts(ids):
+                for rowid, name, state, reason in conn.execute(
+                        "SELECT rowid, name, state, reason FROM wars WHERE rowid IN ("
+                        + ','.join('?' * len(part)) + ")", part):
+                    current[rowid] = (name, state, reason)
+        return current
+
+    def _check_rows(self, current, rows, missing_ok: bool = False):
+        # a rowid Cactus reused for another row, a row edited since, or
+        # (unless missing_ok) one deleted since
+        for rowid, name, state, reason in rows:
+            values = current.get(rowid)
+            if values is None and missing_ok:
+                continue
+            if values != (name, state, reason):
+                raise BackupConflictError(f'{self.path.name} changed since this write, cannot undo it')
+
+    def _has_payload(self, offset: int, payload: bytes) -> bool:
+        if not self.path.exists() or self.path.stat().st_size < offset + len(payload):
+            return False
+        with self.path.open('rb') as f:
+            f.seek(offset)
+            return f.read(len(payload)) == payload
+
+    def _cut(self, offset: int, payload: bytes, settle: bool = False):
+        # remove the appended bytes; a plain truncate when nothing was
+        # written after them, otherwise a streaming rewrite around the gap
+        import shutil
+        if not self._has_payload(offset, payload):
+            if settle:
+                return
+            raise ValueError(f'{self.path.name} changed since this write, cannot undo it')
+        end = offset + len(payload)
+        if self.path.stat().st_size == end:
+            with self.path.open('r+b') as f:
+                f.truncate(offset)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with self.path.open('rb') as src, tmp.open('wb') as dst:
+                _copy_range(src, dst, offset)
+                src.seek(end)
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(str(tmp), str(self.path))
+            fsync_dir(self.path)
+        tater_cache.invalidate(self.path)
+
+    def _has_ranges(self, ranges, payload: bytes) -> bool:
+        # True while the file still holds the bytes of a cut at their
+        # original offsets
+        if not self.path.exists():
+            return False
+        pos = 0
+        with self.path.open('rb') as f:
+            for offset, length in ranges:
+                f.seek(offset)
+                if f.read(length) != payload[pos:pos + length]:
+                    return False
+                pos += length
+        return True
+
+    def _splice(self, meta, payload: bytes, settle: bool = False):
+        # undo of a cut: put the removed bytes back at their offsets
+        if settle and self._has_ranges(meta['ranges'], payload):
+            return
+        if not self.path.exists() or self.path.stat().st_size < meta['size']:
+            raise ValueError(f'{self.path.name} changed since this write, cannot undo it')
+        self._rewrite(meta['ranges'], payload, remove=False)
+
+    def _rewrite(self, ranges, payload: bytes, remove: bool):
+        # one streaming pass: drop the ranges (remove) or insert them back
+        import shutil
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        pos = 0
+        shift = 0
+        with self.path.open('rb') as src, tmp.open('wb') as dst:
+            for offset, length in ranges:
+                # offsets are in the uncut file; the cut file lacks the
+                # ranges before this one
+                _copy_range(src, dst, offset - shift - src.tell())
+                if remove:
+                    src.seek(offset + length)
+                else:
+                    dst.write(payload[pos:pos + length])
+                    shift += length
+                pos += length
+            shutil.copyfileobj(src, dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(str(tmp), str(self.path))
+        fsync_dir(self.path)
+        tater_cache.invalidate(self.path)
+
+    def _edit_spans(self, meta, payload: bytes, forward: bool):
+        # (offset in the current file, bytes expected there, bytes to put
+        # instead) of an edit going forward (redo) or back (undo)
+        old, new = payload[:meta['split']], payload[meta['split']:]
+        spans = []
+        pos_old = pos_new = shift = 0
+        for offset, old_len, new_len in meta['ranges']:
+            before = old[pos_old:pos_old + old_len]
+            after = new[pos_new:pos_new + new_len]
+            pos_old += old_len
+            pos_new += new_len
+            if forward:
+                spans.append((offset, before, after))
+            else:
+                spans.append((offset + shift, after, before))
+                shift += new_len - old_len
+        return spans
+
+    def _holds(self, spans) -> bool:
+        if not self.path.exists():
+            return False
+        with self.path.open('rb') as f:
+            for offset, expected, _ in spans:
+                f.seek(offset)
+                if f.read(len(expected)) != expected:
+                    return False
+        return True
+
+    def _swap(self, meta, payload: bytes, forward: bool, settle: bool = False):
+        # one streaming pass putting either side of an edit in place; with
+        # settle a step found already done is left alone
+        spans = self._edit_spans(meta, payload, forward)
+        if not self._holds(spans):
+            if settle and self._holds(self._edit_spans(meta, payload, not forward)):
+                return
+            raise ValueError(f'{self.path.name} changed since this write, cannot undo it')
+        import shutil
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with self.path.open('rb') as src, tmp.open('wb') as dst:
+            for offset, expected, replacement in spans:
+                _copy_range(src, dst, offset - src.tell())
+                dst.write(replacement)
+                src.seek(offset + len(expected))
+            shutil.copyfileobj(src, dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(str(tmp), str(self.path))
+        fsync_dir(self.path)
+        tater_cache.invalidate(self.path)
+
+    def _count_rows(self, ids) -> int:
+        with cactus_db.connection(self.path, create=True) as conn:
+            return sum(conn.execute("SELECT COUNT(1) FROM wars WHERE rowid IN (" + ','.join('?' * len(part)) + ")",
+                                    part).fetchone()[0] for part in _parts(ids))
+
+    def _execute(self, statements):
+        with cactus_db.connection(self.path, create=True) as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for sql, params in statements:
+                    conn.execute(sql, params)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            # sql deltas add or drop indexes
+            conn.schema.clear()
+
+    def disk_usage(self) -> int:
+        cat = self._read_catalog()
+        return self._base_size(cat) + sum(e['size'] for e in cat['entries'])
+
+
+def _write_delta_file(dest: Path, meta: dict, payload: bytes, source=None):
+    # source is an optional (path, offset, length) appended after payload
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + '.tmp')
+    if source is None:
+        write_durable(tmp, json.dumps(meta).encode('utf-8') + b'\n' + payload)
+    else:
+        path, offset, length = source
+        with path.open('rb') as src, tmp.open('wb') as dst:
+            dst.write(json.dumps(meta).encode('utf-8') + b'\n' + payload)
+            src.seek(offset)
+            _copy_range(src, dst, length)
+            dst.flush()
+            os.fsync(dst.fileno())
+    os.replace(str(tmp), str(dest))
+    fsync_dir(dest)
+
+
+def _parts(items, size=_SQL_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _copy_range(src, dst, length: int, bufsize: int = 1024 * 1024):
+    while length > 0:
+        buf = src.read(min(bufsize, length))
+        if not buf:
+            break
+        dst.write(buf)
+        length -= len(buf)
@@ -0,0 +1,231 @@
+import threading
+from array import array
+from bisect import bisect_right
+from heapq import merge
+from itertools import islice
+
+from warlist_core import STATE_MAP, cactus_connect_readonly, cactus_has_wars, file_signature
+
+# --- browsing existing entries ---
+# every group gets one casefolded text blob with a line per entry and each
+# field behind FIELD_MARK:  \x1fnick\x1fclan\x1freason\n
+# A substring search is str.find over the blob, a prefix search finds
+# FIELD_MARK + text, and bisect over the line starts turns a hit into its
+# entry. Pages are keyed by ref (entry number for Tater, rowid for
+# Cactus): the next page asks for refs after the last one shown, so a
+# keystroke only pays for the first screenful.
+
+FIELD_MARK = '\x1f'
+PAGE_SIZE = 200
+SQL_IN_LIMIT = 500
+
+
+def _clean(field: str) -> str:
+    return field.replace('\n', ' ').replace(FIELD_MARK, ' ')
+
+
+class _Part:
+    # the entries of one group
+    def __init__(self):
+        self._lines = []
+        self._size = 0
+        self.starts = array('q')
+        self.refs = array('q')
+        self.blob = ''
+
+    def add(self, ref: int, nick: str, clan: str, reason: str):
+        line = f'{FIELD_MARK}{_clean(nick)}{FIELD_MARK}{_clean(clan)}{FIELD_MARK}{_clean(reason)}\n'.casefold()
+        self.starts.append(self._size)
+        self.refs.append(ref)
+        self._lines.append(line)
+        self._size += len(line)
+
+    def freeze(self):
+        self.blob = ''.join(self._lines)
+        self._lines = None
+
+    def refs_after(self, after: int, needle: str):
+        # refs above after whose line contains needle, ascending
+        refs, starts, blob = self.refs, self.starts, self.blob
+        first = bisect_right(refs, after)
+        if not needle:
+            for i in range(first, len(refs)):
+                yield refs[i]
+            return
+        if first >= len(refs):
+            return
+        pos = starts[first]
+        while True:
+            pos = blob.find(needle, pos)
+            if pos < 0:
+                return
+            line = bisect_right(starts, pos) - 1
+            yield refs[line]
+            if line + 1 >= len(starts):
+                return
+            pos = starts[line + 1]
+
+
+class EntryIndex:
+    def __init__(self, path):
+        self.path = path
+        self.parts = {}
+        self.count = 0
+
+    def build(self, entries, progress, cancelled):
+        # entries are (ref, group, nick, clan, reason) in ascending ref order
+        for ref, group, nick, clan, reason in entries:
+            part = self.parts.get(group)
+            if part is None:
+                part = self.parts[group] = _Part()
+            part.add(ref, nick, clan, reason)
+            self._keep(ref, group, nick, clan, reason)
+            self.count += 1
+            if not self.count % 10000:
+                progress(self.count, 0)
+                if cancelled():
+                    return False
+        for part in self.parts.values():
+            part.freeze()
+        self._frozen()
+        return True
+
+    def _keep(self, ref, group, nick, clan, reason):
+        pass
+
+    def _frozen(self):
+        pass
+
+    def groups(self):
+        return sorted(self.parts, key=str)
+
+    def group_count(self, group=None) -> int:
+        if group is None:
+            return self.count
+        part = self.parts.get(group)
+        return len(part.refs) if part is not None else 0
+
+    def refs(self, text: str = '', group=None, prefix: bool = False, after: int = -1, limit: int = PAGE_SIZE):
+        needle = _clean(text.strip()).casefold()
+        if prefix and needle:
+            needle = FIELD_MARK + needle
+        if group is None:
+            parts = list(self.parts.values())
+        else:
+            parts = [self.parts[group]] if group in self.parts else []
+        return list(islice(merge(*(part.refs_after(after, needle) for part in parts)), limit))
+
+    def page(self, text: str = '', group=None, prefix: bool = False, after: int = -1, limit: int = PAGE_SIZE):
+        # [(ref, group, nick, clan, reason)] of the next matches after ref
+        return self.rows(self.refs(text, group, prefix, after, limit))
+
+    def rows(self, refs):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class TaterEntries(EntryIndex):
+    # refs are entry numbers, so the original fields sit in one more blob
+    # addressed by ref
+    def __init__(self, path):
+        super().__init__(path)
+        self._lines = []
+        self._size = 0
+        self._starts = array('q')
+        self._text = ''
+
+    def _keep(self, ref, group, nick, clan, reason):
+        line = FIELD_MARK.join(_clean(f) for f in (group, nick, clan, reason)) + '\n'
+        self._starts.append(self._size)
+        self._lines.append(line)
+        self._size += len(line)
+
+    def _frozen(self):
+        self._text = ''.join(self._lines)
+        self._lines = None
+        self._starts.append(self._size)
+
+    def rows(self, refs):
+        text, starts = self._text, self._starts
+        return [(ref,) + tuple(text[starts[ref]:starts[ref + 1] - 1].split(FIELD_MARK)) for ref in refs]
+
+
+class CactusEntries(EntryIndex):
+    # only the search blobs live in memory; rows come from the table a page
+    # at a time over a read-only connection of our own, so a running write
+    # on the shared handle never blocks the GUI thread
+    def __init__(self, path):
+        super().__init__(path)
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = cactus_connect_readonly(self.path)
+        return self._conn
+
+    @staticmethod
+    def _group(state):
+        return _STATE_GROUPS.get(state, str(state))
+
+    def rows(self, refs):
+        if not refs:
+            return []
+        found = {}
+        conn = self._connection()
+        for i in range(0, len(refs), SQL_IN_LIMIT):
+            chunk = refs[i:i + SQL_IN_LIMIT]
+            sql = f"SELECT rowid, state, name, reason FROM wars WHERE rowid IN ({','.join('?' * len(chunk))})"
+            for rowid, state, name, reason in conn.execute(sql, chunk):
+                found[rowid] = (rowid, self._group(state), name or '', '', reason or '')
+        # a row deleted since the index was built is simply left out
+        return [found[ref] for ref in refs if ref in found]
+
+    def page(self, text: str = '', group=None, prefix: bool = False, after: int = -1, limit: int = PAGE_SIZE):
+        if text.strip():
+            return super().page(text, group, prefix, after, limit)
+        # plain listing is a keyset query on the rowid
+        conn = self._connection()
+        if not cactus_has_wars(conn):
+            return []
+        if group is None:
+            cur = conn.execute("SELECT rowid, state, name, reason FROM wars WHERE rowid > ? AND name IS NOT NULL "
+                               "ORDER BY rowid LIMIT ?", (after, limit))
+        else:
+            state = STATE_MAP.get(group)
+            if state is None:
+                try:
+                    state = int(group)
+                except ValueError:
+                    return []
+            cur = conn.execute("SELECT rowid, state, name, reason FROM wars WHERE rowid > ? AND state = ? "
+                               "AND name IS NOT NULL ORDER BY rowid LIMIT ?", (after, state, limit))
+        return [(rowid, self._group(state), name or '', '', reason or '') for rowid, state, name, reason in cur]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_STATE_GROUPS = {state: group for group, state in STATE_MAP.items()}
+
+# the index of the file last browsed, rebuilt when any of its files change
+_current = {'key': None, 'index': None}
+_current_guard = threading.Lock()
+
+
+def entry_index(backend, progress, cancelled):
+    key = (str(backend.path.resolve()), tuple(file_signature(p) for p in backend.watch_files()))
+    with _current_guard:
+        if _current['key'] == key:
+            return _current['index']
+    index = (CactusEntries if backend.cactus else TaterEntries)(backend.path)
+    if not index.build(backend.iter_entries(), progress, cancelled):
+        return None
+    with _current_guard:
+        _current['key'], _current['index'] = key, index
+    # the GUI thread may still page through the old index; the view closes
+    # it when it switches over
+    return index
@@ -0,0 +1,209 @@
+import sys
+import argparse
+from pathlib import Path
+
+from warlist_core import (
+    STATE_MAP, IMPORT_FORMATS, cactus_db, format_timings, is_cactus_path, guess_import_format,
+    iter_import_entries, iter_chunks
+)
+from warlist_backends import open_backend, sync_backends
+from warlist_backup import BackupStore
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_PARTIAL = 3
+
+
+def _open_inputs(names):
+    for name in names or ['-']:
+        if name == '-':
+            yield name, sys.stdin
+        else:
+            with open(name, encoding='utf-8', errors='replace', newline='') as f:
+                yield name, f
+
+
+def _iter_entries(args, report):
+    # (group, nick, clan, reason) with defaults applied; bad rows go to report
+    for name, stream in _open_inputs(args.inputs):
+        fmt = args.format if args.format != 'auto' else guess_import_format(name)
+        yield from iter_import_entries(stream, fmt, args.group, args.clan, args.reason, args.cactus,
+                                       lambda lineno, msg: report(f'{name}:{lineno}: {msg}'))
+
+
+def _dry_run(backend, args, entries):
+    added = skipped = 0
+    seen = set()
+    for chunk in iter_chunks(entries, args.chunk_size):
+        new, dups = backend.diff(chunk, seen)
+        added += len(new)
+        skipped += len(dups)
+    return added, skipped
+
+
+def _import(backend, args, entries, store):
+    if args.dry_run:
+        return _dry_run(backend, args, entries)
+    sidecars = backend.sidecars()
+    if sidecars:
+        print(f'note: {", ".join(p.name for p in sidecars)} present, the database may be open in the client',
+              file=sys.stderr)
+    result = backend.apply_batch(entries, store=store, chunk_size=args.chunk_size)
+    if result['recovered']:
+        print(f'journal: {result["recovered"]}', file=sys.stderr)
+    if result['base']:
+        print(f'backup: {result["base"]}', file=sys.stderr)
+    if result['delta']:
+        # the whole run is one delta, so one undo reverts it
+        print(f'history: #{result["delta"]["seq"]}', file=sys.stderr)
+    return result['added'], result['skipped']
+
+
+def _history_command(args):
+    store = BackupStore(args.path, args.cactus)
+    if args.undo is not None:
+        done = store.undo(args.undo)
+    elif args.redo is not None:
+        done = store.redo(args.redo)
+    elif args.restore_base:
+        done = store.restore_base()
+    else:
+        done = store.history()
+    for entry in done:
+        print(store.describe(entry))
+    if args.restore_base:
+        print(f'restored {store.base_path}', file=sys.stderr)
+    elif not done:
+        print('no recorded writes' if args.history else 'nothing to do', file=sys.stderr)
+    return EXIT_OK
+
+
+def _compact_command(args):
+    if not args.path.exists():
+        print(f'error: {args.path} not found', file=sys.stderr)
+        return EXIT_FAILURE
+    backend = open_backend(args.path, args.cactus)
+    store = None if args.no_backup else BackupStore.for_backend(backend)
+    result = backend.compact(store=store)
+    if result['base']:
+        print(f'backup: {result["base"]}', file=sys.stderr)
+    if result['delta']:
+        print(f'history: #{result["delta"]["seq"]}', file=sys.stderr)
+    print(f'removed {result["removed"]} duplicate entries, size {result["size_before"]} -> '
+          f'{result["size_after"]} bytes, key load {result["parse_before"] * 1000:.1f} -> '
+          f'{result["parse_after"] * 1000:.1f} ms')
+    return EXIT_OK
+
+
+def _sync_command(args):
+    both = args.sync_with is not None
+    other = args.sync_with if both else args.sync_to
+    source = open_backend(args.path, args.cactus)
+    target = open_backend(other)
+    stores = {}
+    if not (args.no_backup or args.dry_run):
+        stores = {'source_store': BackupStore.for_backend(source), 'target_store': BackupStore.for_backend(target)}
+    result = sync_backends(source, target, both=both, dry_run=args.dry_run, **stores)
+    verb = 'would add' if args.dry_run else 'added'
+    for name, src, dst in (('forward', source, target), ('backward', target, source)):
+        if name == 'backward' and not both:
+            continue
+        applied = result['applied'].get(name)
+        added = applied['added'] if applied else len(result[name])
+        print(f'{src.path} -> {dst.path}: {verb} {added}')
+        if applied and applied['delta']:
+            print(f'history: {dst.path} #{applied["delta"]["seq"]}', file=sys.stderr)
+    stats = result['stats']
+    if any(stats.values()):
+        print(f'clans dropped {stats["clan_dropped"]}, clan-only entries skipped {stats["clan_only"]}, '
+              f'unmapped groups skipped {stats["unmapped"]}')
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='warlist_cli',
+        description='Import nicks into a Tater cfg or Cactus SQLite warlist without starting the GUI.',
+        epilog='exit status: 0 ok, 1 write failed, 2 usage error, 3 some input rows were rejected')
+    parser.add_argument('inputs', nargs='*', metavar='INPUT', help="input files, '-' or nothing for stdin")
+    parser.add_argument('--path', required=True, type=Path, help='tclient_warlist.cfg or cactus.sqlite3')
+    parser.add_argument('--client', choices=('auto', 'tater', 'cactus'), default='auto',
+                        help='target client (default: by file extension)')
+    parser.add_argument('--format', choices=('auto',) + IMPORT_FORMATS, default='auto',
+                        help='input format (default: by file extension, nick list for stdin)')
+    parser.add_argument('--group', choices=tuple(STATE_MAP), default='enemy', help='default group')
+    parser.add_argument('--clan', default='', help='default clan (Tater only)')
+    parser.add_argument('--reason', default='', help='default reason')
+    parser.add_argument('--no-backup', action='store_true', help='do not record the write in the backup store')
+    parser.add_argument('--dry-run', action='store_true', help='only report what would be written')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per write batch')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not list rejected rows')
+    parser.add_argument('--timings', action='store_true', help='print per-query SQLite timings (Cactus)')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--history', action='store_true', help='list recorded writes of --path and exit')
+    action.add_argument('--undo', type=int, metavar='N', help='revert the last N recorded writes and exit')
+    action.add_argument('--redo', type=int, metavar='N', help='re-apply the last N reverted writes and exit')
+    action.add_argument('--restore-base', action='store_true',
+                        help='put back the full copy taken before the oldest recorded write and exit; '
+                             'the writes stay available to --redo')
+    action.add_argument('--compact', action='store_true',
+                        help='drop duplicate entries of --path, keeping the first of each, and exit')
+    action.add_argument('--sync-to', type=Path, metavar='PATH',
+                        help='copy the entries of --path missing from PATH (cfg or SQLite) and exit')
+    action.add_argument('--sync-with', type=Path, metavar='PATH',
+                        help='copy missing entries both ways between --path and PATH and exit')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be positive')
+    for name in args.inputs:
+        if name != '-' and not Path(name).is_file():
+            parser.error(f'input file not found: {name}')
+    args.cactus = args.client == 'cactus' or (args.client == 'auto' and is_cactus_path(args.path))
+    if (args.undo is not None and args.undo < 1) or (args.redo is not None and args.redo < 1):
+        parser.error('--undo and --redo need a positive count')
+    sync = args.sync_to is not None or args.sync_with is not None
+    if args.history or args.compact or args.restore_base or sync or args.undo is not None or args.redo is not None:
+        if args.inputs:
+            parser.error('--history, --undo, --redo, --restore-base, --compact and --sync-* take no input files')
+        try:
+            if sync:
+                return _sync_command(args)
+            return _compact_command(args) if args.compact else _history_command(args)
+        except Exception as e:
+            print(f'error: {e}', file=sys.stderr)
+            return EXIT_FAILURE
+        finally:
+            cactus_db.close()
+
+    rejected = 0
+    backend = open_backend(args.path, args.cactus)
+    store = None if args.no_backup or args.dry_run else BackupStore.for_backend(backend)
+
+    def report(msg):
+        nonlocal rejected
+        rejected += 1
+        if not args.quiet:
+            print(msg, file=sys.stderr)
+
+    try:
+        added, skipped = _import(backend, args, _iter_entries(args, report), store)
+    except Exception as e:
+        print(f'error: {e}', file=sys.stderr)
+        return EXIT_FAILURE
+    finally:
+        if args.timings:
+            print('\n'.join(format_timings(backend.take_timings())), file=sys.stderr)
+        cactus_db.close()
+
+    verb = 'would add' if args.dry_run else 'added'
+    print(f'{verb} {added}, skipped duplicates {skipped}, rejected {rejected}')
+    return EXIT_PARTIAL if rejected else EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
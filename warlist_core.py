@@ -0,0 +1,1212 @@
+import os
+import re
+import sys
+import time
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, chain
+from pathlib import Path
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import add
+
+# sqlite3, csv, json, shutil and urllib are imported where they are used:
+# the GUI start-up path and the Tater-only paths never need them.
+
+__version__ = "v1.1"
+REPO_API_LATEST = "https://api.github.com/repos/Ap4kk/DDNet-Warlist-Editor/releases/latest"
+REPO_PAGE = "https://github.com/Ap4kk/DDNet-Warlist-Editor"
+
+STATE_MAP = {'enemy': 1, 'team': 3}
+WARS_SCHEMA = "CREATE TABLE IF NOT EXISTS wars (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, state INTEGER, reason TEXT)"
+CACTUS_SUFFIXES = ('.sqlite3', '.sqlite', '.db')
+
+
+def quote_field(s: str) -> str:
+    if s is None:
+        s = ""
+    s = s.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{s}"'
+
+
+# lines written by quote_field: every argument double-quoted, only \\ and \"
+# escaped. Anything else falls through to the general scanner below.
+_QUOTED = r'"([^"\\]*(?:\\.[^"\\]*)*)"'
+_WAR_LINE_RE = re.compile(
+    r'add_war_entry[ \t]+' + _QUOTED + r'[ \t]+' + _QUOTED + r'[ \t]+' + _QUOTED +
+    r'(?:[ \t]+"[^"\\]*(?:\\.[^"\\]*)*")*[ \t]*', re.S)
+_WAR_ENTRY_RE = re.compile(
+    r'add_war_entry[ \t]+' + _QUOTED + r'[ \t]+' + _QUOTED + r'[ \t]+' + _QUOTED +
+    r'(?:[ \t]+' + _QUOTED + r')?(?:[ \t]+"[^"\\]*(?:\\.[^"\\]*)*")*[ \t]*', re.S)
+_CFG_WHITESPACE = ' \t\r\n'
+
+
+def _unescape(field: str) -> str:
+    if '\\' not in field:
+        return field
+    # escape pairs are consumed left to right, exactly like str.split does
+    return '\\'.join(part.replace('\\"', '"') for part in field.split('\\\\'))
+
+
+def split_cfg_line(line: str):
+    # single-pass equivalent of shlex.split (posix, no comments);
+    # returns None where shlex would raise
+    tokens = []
+    buf = []
+    in_token = False
+    i, n = 0, len(line)
+    while i < n:
+        ch = line[i]
+        if ch in _CFG_WHITESPACE:
+            if in_token:
+                tokens.append(''.join(buf))
+                buf = []
+                in_token = False
+            i += 1
+            continue
+        in_token = True
+        if ch == '"':
+            i += 1
+            while True:
+                if i >= n:
+                    return None
+                ch = line[i]
+                if ch == '"':
+                    break
+                if ch == '\\':
+                    if i + 1 >= n:
+                        return None
+                    nxt = line[i + 1]
+                    buf.append(nxt if nxt in '"\\' else ch + nxt)
+                    i += 2
+                    continue
+                buf.append(ch)
+                i += 1
+            i += 1
+        elif ch == "'":
+            end = line.find("'", i + 1)
+            if end < 0:
+                return None
+            buf.append(line[i + 1:end])
+            i = end + 1
+        elif ch == '\\':
+            if i + 1 >= n:
+                return None
+            buf.append(line[i + 1])
+            i += 2
+        else:
+            buf.append(ch)
+            i += 1
+    if in_token:
+        tokens.append(''.join(buf))
+    return tokens
+
+
+def parse_war_line(line: str):
+    # (group, nick, clan) of a stripped add_war_entry line, or None
+    m = _WAR_LINE_RE.fullmatch(line)
+    if m:
+        return _unescape(m.group(1)), _unescape(m.group(2)), _unescape(m.group(3))
+    parts = split_cfg_line(line)
+    if parts and len(parts) >= 4 and parts[0] == 'add_war_entry':
+        return parts[1], parts[2], parts[3]
+    return None
+
+
+def parse_war_entry(line: str):
+    # (group, nick, clan, reason) of a stripped add_war_entry line, or None;
+    # a missing reason is ''
+    m = _WAR_ENTRY_RE.fullmatch(line)
+    if m:
+        return (_unescape(m.group(1)), _unescape(m.group(2)), _unescape(m.group(3)),
+                _unescape(m.group(4) or ''))
+    parts = split_cfg_line(line)
+    if parts and len(parts) >= 4 and parts[0] == 'add_war_entry':
+        return parts[1], parts[2], parts[3], parts[4] if len(parts) > 4 else ''
+    return None
+
+
+def iter_existing_keys(text: str):
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or not line.startswith('add_war_entry'):
+            continue
+        parsed = parse_war_line(line)
+        if parsed:
+            group, nick, clan = parsed
+            yield group, nick.casefold(), clan.casefold()
+
+
+def parse_existing_entries(text: str):
+    return set(iter_existing_keys(text))
+
+
+# --- compact key store ---
+# a set of (group, nick, clan) tuples costs ~240 bytes per entry: the tuple,
+# three str objects and the hash slot. CompactKeySet keeps every key as one
+# \0-joined, UTF-8 encoded string in a single append-only bytes blob with an
+# int64 offset array beside it, plus the hashes sorted in an int64 array
+# next to each key's index - ~45 bytes per entry for ascii keys, ~53 for
+# Cyrillic ones (two bytes a letter; tests/bench_compact_keys.py measures
+# it). A str blob would widen to two or four bytes per character for every
+# key as soon as one nick needed it. A lookup bisects the hash array within
+# the bucket a directory on the top hash bits points at (about four entries
+# a bucket, 2^16 buckets at most), and confirms a hash hit by comparing the
+# blob slice with the encoded key, so collisions never give a false answer.
+# Keys added later go to a plain set (the tail) of encoded keys that is
+# merged in once it holds KEY_MERGE_CHUNK keys: a merge copies array slices
+# around the new keys and appends them to the blob, so building from a
+# stream never holds more than one chunk as separate objects. The arrays,
+# blob and directory live in one tuple that a merge replaces as a whole and
+# never changes in place, so a reader on another thread sees either the old
+# or the new state. Hashes are Python's bytes hash: stable within a process,
+# and the store is never written to disk.
+
+KEY_SEP = '\0'
+KEY_DIRECTORY_BITS = 16
+KEY_MERGE_CHUNK = 1 << 16
+_HASH_BIAS = 1 << (sys.hash_info.width - 1)
+
+
+def _key_state(hashes, order, offsets, blob, directory=None):
+    # a directory carried over from a merge is kept while the bucket count
+    # still fits the entry count
+    bits = min(KEY_DIRECTORY_BITS, max(0, len(hashes).bit_length() - 2))
+    shift = sys.hash_info.width - bits
+    if directory is None or len(directory) != (1 << bits) + 1:
+        directory = array('q', [0])
+        for bucket in range(1, 1 << bits):
+            directory.append(bisect_left(hashes, (bucket << shift) - _HASH_BIAS, directory[-1]))
+        directory.append(len(hashes))
+    return hashes, order, offsets, blob, directory, shift
+
+
+_EMPTY_KEY_STATE = _key_state(array('q'), array('I'), array('q', [0]), b'')
+
+
+def _encode_key(key) -> bytes:
+    return KEY_SEP.join(key).encode('utf-8', 'surrogatepass')
+
+
+def _decode_key(joined: bytes):
+    return tuple(joined.decode('utf-8', 'surrogatepass').split(KEY_SEP))
+
+
+def _find_key(state, joined: bytes, h: int):
+    # (index, found): where the hash sits in the sorted array
+    hashes, order, offsets, blob, directory, shift = state
+    bucket = (h + _HASH_BIAS) >> shift
+    i = j = bisect_left(hashes, h, directory[bucket], directory[bucket + 1])
+    while j < len(hashes) and hashes[j] == h:
+        k = order[j]
+        if blob[offsets[k]:offsets[k + 1]] == joined:
+            return i, True
+        j += 1
+    return i, False
+
+
+class CompactKeySet:
+    def __init__(self, keys=()):
+        self._state = _EMPTY_KEY_STATE
+        self._tail = set()
+        self.update(keys)
+
+    def __len__(self):
+        state = self._state
+        extra = sum(1 for joined in list(self._tail) if not _find_key(state, joined, hash(joined))[1])
+        return len(state[0]) + extra
+
+    def __contains__(self, key):
+        # _find_key inlined: this is the per-row check of every import
+        joined = KEY_SEP.join(key).encode('utf-8', 'surrogatepass')
+        if joined in self._tail:
+            return True
+        hashes, order, offsets, blob, directory, shift = self._state
+        h = hash(joined)
+        bucket = (h + _HASH_BIAS) >> shift
+        j = bisect_left(hashes, h, directory[bucket], directory[bucket + 1])
+        while j < len(hashes) and hashes[j] == h:
+            k = order[j]
+            if blob[offsets[k]:offsets[k + 1]] == joined:
+                return True
+            j += 1
+        return False
+
+    def __iter__(self):
+        # the tail is read first: a merge publishes the new state before
+        # it empties the tail, so no key falls between the two
+        tail = list(self._tail)
+        state = self._state
+        offsets, blob = state[2], state[3]
+        for k in range(len(offsets) - 1):
+            yield _decode_key(blob[offsets[k]:offsets[k + 1]])
+        for joined in tail:
+            if not _find_key(state, joined, hash(joined))[1]:
+                yield _decode_key(joined)
+
+    def add(self, key):
+        self.update((key,))
+
+    def update(self, keys):
+        # keys already in the arrays are dropped when the tail is merged
+        tail = self._tail
+        for key in keys:
+            tail.add(_encode_key(key))
+            if len(tail) >= KEY_MERGE_CHUNK:
+                self._merge()
+                tail = self._tail
+
+    def pack(self):
+        # for a set that is kept around: a tail worth more than a sliver of
+        # the arrays goes into them
+        if len(self._tail) > len(self._state[0]) >> 4:
+            self._merge()
+
+    def with_extra(self, keys):
+        # a copy sharing the state, plus keys; neither side sees the
+        # other's later additions
+        other = CompactKeySet.__new__(CompactKeySet)
+        other._state = self._state
+        other._tail = set(self._tail)
+        other.update(keys)
+        return other
+
+    def _merge(self):
+        hashes, order, offsets, blob, directory, shift = self._state
+        n = len(hashes)
+        new_hashes, new_order = array('q'), array('I')
+        counts = array('q', bytes(8 * len(directory)))
+        added = []
+        put_hash, put_order, put_key = new_hashes.append, new_order.append, added.append
+        prev = 0
+        for joined in sorted(self._tail, key=hash):
+            h = hash(joined)
+            bucket = (h + _HASH_BIAS) >> shift
+            i = j = bisect_left(hashes, h, directory[bucket], directory[bucket + 1])
+            while j < n and hashes[j] == h:
+                k = order[j]
+                if blob[offsets[k]:offsets[k + 1]] == joined:
+                    break
+                j += 1
+            else:
+                if i > prev:
+                    new_hashes += hashes[prev:i]
+                    new_order += order[prev:i]
+                    prev = i
+                put_hash(h)
+                put_order(n + len(added))
+                put_key(joined)
+                counts[bucket + 1] += 1
+        new_hashes += hashes[prev:]
+        new_order += order[prev:]
+        new_offsets = offsets + array('q', accumulate(chain((offsets[-1],), map(len, added))))[1:]
+        new_directory = array('q', map(add, directory, accumulate(counts)))
+        self._state = _key_state(new_hashes, new_order, new_offsets, blob + b''.join(added), new_directory)
+        self._tail = set()
+
+
+class TaterParseCache:
+    # (group, nick, clan) key sets of parsed cfg files, keyed on path and
+    # revalidated by device + inode, size and mtime. A file that only grew
+    # by appends is parsed from the last complete line on; a file that was
+    # replaced (temp + rename gives a new inode), shrunk, kept its size
+    # under a new mtime (an append always grows it) or had its head or
+    # seam bytes changed is parsed again from scratch. Keys are held in a
+    # CompactKeySet.
+    FINGERPRINT = 256
+    BLOCK = 1 << 22
+
+    def __init__(self):
+        self._files = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _file_lock(self, cache_key: str):
+        # one lock per file, so several files parse at the same time
+        with self._lock:
+            return self._locks.setdefault(cache_key, threading.Lock())
+
+    def keys(self, path: Path):
+        # the returned set is shared with the cache and never changed
+        # after it is returned - treat it as read-only
+        path = Path(path)
+        cache_key = os.path.normcase(str(path.resolve()))
+        with self._file_lock(cache_key):
+            entry = self._files.get(cache_key)
+            with path.open('rb') as f:
+                # the stat of the open file, so a rename after it cannot
+                # pair one file's identity with another's bytes
+                st = os.fstat(f.fileno())
+                file_id = (st.st_dev, st.st_ino)
+                same_file = entry is not None and entry['id'] == file_id
+                if same_file and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns:
+                    return entry['result']
+                if not (same_file and st.st_size > entry['size'] and self._unchanged_prefix(f, entry)):
+                    entry = {'keys': CompactKeySet(), 'offset': 0, 'head': b'', 'seam': b'', 'id': file_id}
+                else:
+                    # appends go into a copy: the key set already handed out
+                    # stays as it was while callers still read it
+                    entry = dict(entry, keys=entry['keys'].with_extra(()))
+                f.seek(entry['offset'])
+                if entry['offset'] == 0:
+                    entry['head'] = f.read(self.FINGERPRINT)
+                    f.seek(0)
+                # whole lines a block at a time, so the decoded text of a big
+                # file is never held at once; a cut after \n is also a line
+                # break for splitlines and a character boundary in utf-8
+                rest = b''
+                for block in iter(lambda: f.read(self.BLOCK), b''):
+                    block = rest + block
+                    cut = block.rfind(b'\n') + 1
+                    if cut:
+                        entry['keys'].update(iter_existing_keys(block[:cut].decode('utf-8', errors='replace')))
+                        entry['offset'] += cut
+                        entry['seam'] = block[max(0, cut - self.FINGERPRINT):cut]
+                    rest = block[cut:]
+            entry['keys'].pack()
+            partial = parse_existing_entries(rest.decode('utf-8', errors='replace')) if rest else None
+            entry['result'] = entry['keys'].with_extra(partial) if partial else entry['keys']
+            entry['size'] = entry['offset'] + len(rest)
+            entry['mtime'] = st.st_mtime_ns
+            self._files[cache_key] = entry
+            return entry['result']
+
+    def _unchanged_prefix(self, f, entry):
+        head = entry['head']
+        if f.read(len(head)) != head:
+            return False
+        seam = entry['seam']
+        f.seek(entry['offset'] - len(seam))
+        return f.read(len(seam)) == seam
+
+    def invalidate(self, path: Path = None):
+        if path is None:
+            with self._lock:
+                self._files.clear()
+            return
+        cache_key = os.path.normcase(str(Path(path).resolve()))
+        with self._file_lock(cache_key):
+            self._files.pop(cache_key, None)
+
+
+tater_cache = TaterParseCache()
+
+
+# --- nick validation ---
+# a nick is invalid when it is empty after strip, longer than NICK_MAX_LEN or
+# holds a character of a Unicode "C" category (control, format, surrogate,
+# private use, unassigned). str.isprintable() answers that in C for almost
+# every nick; only a nick it rejects is walked with unicodedata, because
+# isprintable() also rejects spaces other than ' ', which are allowed.
+# The walk is memoized; the fast path is cheaper than a cache lookup.
+
+NICK_MAX_LEN = 64
+NICK_CACHE_SIZE = 1 << 14
+NICK_EMPTY = 'empty'
+NICK_TOO_LONG = 'too_long'
+NICK_CONTROL_CHAR = 'control_char'
+
+
+def nick_problem(nick: str):
+    # None for a valid nick, otherwise one of the NICK_* reasons
+    s = nick.strip()
+    if not s:
+        return NICK_EMPTY
+    if len(s) > NICK_MAX_LEN:
+        return NICK_TOO_LONG
+    if s.isprintable():
+        return None
+    return _unprintable_problem(s)
+
+
+@lru_cache(maxsize=NICK_CACHE_SIZE)
+def _unprintable_problem(s: str):
+    import unicodedata
+    for ch in s:
+        if not ch.isprintable() and unicodedata.category(ch).startswith('C'):
+            return NICK_CONTROL_CHAR
+    return None
+
+
+def check_nicks(nicks, allow_empty: bool = False):
+    # nick_problem of every nick, in order; None means valid. allow_empty
+    # passes '' and None, the nick of a clan-only entry
+    empty = None if allow_empty else NICK_EMPTY
+    return [nick_problem(nick) if nick else empty for nick in nicks]
+
+
+def safe_nick(nick: str) -> bool:
+    return nick is not None and nick_problem(nick) is None
+
+
+# the duplicate lookups that run against wars: a batch staged in a temp
+# table, then one anti-join (insert) or join (preview) over the table
+CACTUS_BATCH_TABLE_SQL = ("CREATE TEMP TABLE IF NOT EXISTS wle_batch "
+                          "(key TEXT PRIMARY KEY, pos INTEGER, name TEXT, reason TEXT)")
+CACTUS_PROBE_TABLE_SQL = "CREATE TEMP TABLE IF NOT EXISTS wle_probe (key TEXT PRIMARY KEY)"
+CACTUS_ANTIJOIN_SQL = ("SELECT name, reason FROM wle_batch "
+                       "WHERE key NOT IN (SELECT lower(name) FROM wars WHERE state=? AND lower(name) IS NOT NULL) "
+                       "ORDER BY pos")
+CACTUS_PROBE_SQL = "SELECT DISTINCT p.key FROM wle_probe p JOIN wars w ON lower(w.name)=p.key AND w.state=?"
+
+
+def cactus_insert_new(conn, entries, state: int, inserted_rows=None):
+    # stage the batch in a temp table and resolve duplicates with a single
+    # anti-join instead of one lower(name) table scan per nick.
+    # entries are (nick, reason) pairs; returns (inserted, skipped). New rows
+    # get rowids above the current maximum, so (rowid, name, state, reason)
+    # of this batch are appended to inserted_rows when it is given
+    rows = [(nick.casefold(), pos, nick, reason or '') for pos, (nick, reason) in enumerate(entries) if nick]
+    conn.execute(CACTUS_BATCH_TABLE_SQL)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM wle_batch")
+        conn.executemany("INSERT OR IGNORE INTO wle_batch (key, pos, name, reason) VALUES (?, ?, ?, ?)", rows)
+        new_rows = conn.execute(CACTUS_ANTIJOIN_SQL, (state,)).fetchall()
+        last_id = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM wars").fetchone()[0]
+        conn.executemany("INSERT INTO wars (name, state, reason) VALUES (?, ?, ?)",
+                         [(name, state, reason) for name, reason in new_rows])
+        if inserted_rows is not None and new_rows:
+            inserted_rows.extend(conn.execute(
+                "SELECT rowid, name, state, reason FROM wars WHERE rowid > ? ORDER BY rowid", (last_id,)))
+        conn.execute("DELETE FROM wle_batch")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(new_rows), len(rows) - len(new_rows)
+
+
+def cactus_existing_keys(conn, keys, state: int):
+    # the casefolded keys that already exist for state, found with one pass
+    # over wars instead of one lookup per key. A join probes the small key
+    # table per row; IN (SELECT ...) would materialize every name first
+    conn.execute(CACTUS_PROBE_TABLE_SQL)
+    try:
+        conn.execute("DELETE FROM wle_probe")
+        conn.executemany("INSERT OR IGNORE INTO wle_probe (key) VALUES (?)", ((key,) for key in keys))
+        return {row[0] for row in conn.execute(CACTUS_PROBE_SQL, (state,))}
+    finally:
+        # ends the implicit transaction so no read lock outlives the call
+        conn.rollback()
+
+
+CACTUS_INDEX_NAME = 'wle_wars_lower_name_state'
+
+
+def cactus_find_lookup_index(conn):
+    # any index on wars(lower(name), state) counts, whoever created it
+    cur = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name='wars' AND sql IS NOT NULL")
+    for name, sql in cur.fetchall():
+        norm = ''.join(sql.lower().split())
+        if '(lower(name),state' in norm:
+            return name
+    return None
+
+
+def cactus_query_plan(conn):
+    # the plans of the statements cactus_existing_keys and cactus_insert_new
+    # run, on their temp tables
+    plan = []
+    conn.execute(CACTUS_PROBE_TABLE_SQL)
+    conn.execute(CACTUS_BATCH_TABLE_SQL)
+    try:
+        for label, sql in (('probe', CACTUS_PROBE_SQL), ('anti-join', CACTUS_ANTIJOIN_SQL)):
+            for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, (1,)).fetchall():
+                plan.append(f'{label}: {row[-1]}')
+    finally:
+        conn.rollback()
+    return plan
+
+
+def cactus_optimize(conn):
+    # plain expression index (SQLite >= 3.9), no partial index or collation
+    # tricks, so any client that can open the DB keeps working with it.
+    # returns (index_name, created)
+    existing = cactus_find_lookup_index(conn)
+    if existing:
+        return existing, False
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {CACTUS_INDEX_NAME} ON wars (lower(name), state)")
+    conn.execute("PRAGMA optimize")
+    conn.commit()
+    return CACTUS_INDEX_NAME, True
+
+
+# --- shared connections ---
+# one long-lived handle per database path instead of a connect/close per
+# preview, write and undo. Handles are shared by the worker threads
+# (check_same_thread=False) and only used under their own lock. A handle
+# caches what it learnt about the schema and is reopened when the file
+# is deleted or replaced. Every statement is timed per SQL text.
+
+_timed_connection_class = None
+
+
+def _connection_class():
+    # sqlite3 is only imported once a database is actually opened
+    global _timed_connection_class
+    if _timed_connection_class is None:
+        import sqlite3
+
+        class TimedConnection(sqlite3.Connection):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.schema = {}
+                self.timings = {}
+
+            def _note(self, sql, started):
+                count, total = self.timings.get(sql, (0, 0.0))
+                self.timings[sql] = (count + 1, total + time.perf_counter() - started)
+
+            def execute(self, sql, parameters=()):
+                started = time.perf_counter()
+                try:
+                    return super().execute(sql, parameters)
+                finally:
+                    self._note(sql, started)
+
+            def executemany(self, sql, seq_of_parameters):
+                started = time.perf_counter()
+                try:
+                    return super().executemany(sql, seq_of_parameters)
+                finally:
+                    self._note(sql, started)
+
+        _timed_connection_class = TimedConnection
+    return _timed_connection_class
+
+
+def _file_identity(path: Path):
+    try:
+        st = os.stat(str(path))
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+class CactusConnections:
+    def __init__(self):
+        self._handles = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def connection(self, path: Path, create: bool = False):
+        # create=True makes the file and the wars table if they are missing;
+        # otherwise a missing file is an error, not a new empty database
+        path = Path(path)
+        while True:
+            handle = self._handle(path, create)
+            with handle['lock']:
+                if handle['conn'] is None:
+                    continue
+                conn = handle['conn']
+                if create and not conn.schema.get('wars'):
+                    conn.execute(WARS_SCHEMA)
+                    conn.commit()
+                    conn.schema['wars'] = True
+                yield conn
+                return
+
+    def _handle(self, path: Path, create: bool):
+        key = os.path.normcase(os.path.abspath(str(path)))
+        ident = _file_identity(path)
+        if ident is None and not create:
+            raise FileNotFoundError(f'{path} not found')
+        with self._guard:
+            handle = self._handles.get(key)
+            if handle is not None and (ident is None or handle['ident'] != ident):
+                stale = self._handles.pop(key)
+                handle = None
+            else:
+                stale = None
+            if handle is None:
+                handle = {'lock': threading.RLock(), 'conn': None, 'ident': None}
+                self._handles[key] = handle
+                with handle['lock']:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    handle['conn'] = _connection_class()(str(path), check_same_thread=False)
+                    handle['ident'] = _file_identity(path)
+        if stale is not None:
+            self._close_handle(stale)
+        return handle
+
+    def _close_handle(self, handle):
+        with handle['lock']:
+            if handle['conn'] is not None:
+                handle['conn'].close()
+                handle['conn'] = None
+
+    def close(self, path: Path = None, keep: Path = None):
+        # close one path, or all of them except keep; waits for a handle
+        # that is in use
+        keep_key = os.path.normcase(os.path.abspath(str(keep))) if keep else None
+        with self._guard:
+            if path is not None:
+                keys = [os.path.normcase(os.path.abspath(str(path)))]
+            else:
+                keys = [k for k in self._handles if k != keep_key]
+            handles = [self._handles.pop(k) for k in keys if k in self._handles]
+        for handle in handles:
+            self._close_handle(handle)
+
+    def invalidate(self, path: Path):
+        # forget cached schema after the file was rewritten behind the handle
+        key = os.path.normcase(os.path.abspath(str(path)))
+        with self._guard:
+            handle = self._handles.get(key)
+        if handle is not None:
+            with handle['lock']:
+                if handle['conn'] is not None:
+                    handle['conn'].schema.clear()
+
+    def take_timings(self, path: Path):
+        # [(sql, count, seconds)] since the last call, slowest first
+        key = os.path.normcase(os.path.abspath(str(path)))
+        with self._guard:
+            handle = self._handles.get(key)
+        if handle is None:
+            return []
+        with handle['lock']:
+            if handle['conn'] is None:
+                return []
+            timings, handle['conn'].timings = handle['conn'].timings, {}
+        return sorted(((sql, count, total) for sql, (count, total) in timings.items()), key=lambda t: -t[2])
+
+
+cactus_db = CactusConnections()
+
+
+def format_timings(timings, limit: int = 10):
+    lines = []
+    for sql, count, total in timings[:limit]:
+        text = ' '.join(sql.split())
+        lines.append(f'{total * 1000:9.1f} ms {count:6d}x  {text[:90]}')
+    return lines
+
+
+# bulk writes trade durability of the last transaction for speed only
+# while they run; journal_mode is left alone because it is persistent and
+# cannot be switched while the client holds the database open
+BULK_PRAGMAS = (('synchronous', 'NORMAL'), ('cache_size', '-65536'), ('temp_store', 'MEMORY'))
+
+
+@contextmanager
+def cactus_bulk_pragmas(conn):
+    saved = [(name, conn.execute(f'PRAGMA {name}').fetchone()[0]) for name, _ in BULK_PRAGMAS]
+    for name, value in BULK_PRAGMAS:
+        conn.execute(f'PRAGMA {name}={value}')
+    try:
+        yield conn
+    finally:
+        for name, value in saved:
+            conn.execute(f'PRAGMA {name}={value}')
+
+
+def cactus_connect_readonly(path: Path):
+    import sqlite3
+    return sqlite3.connect(Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+
+
+def cactus_has_wars(conn) -> bool:
+    # a shared connection remembers a positive answer
+    schema = getattr(conn, 'schema', None)
+    if schema and schema.get('wars'):
+        return True
+    cur = conn.execute("SELECT COUNT(1) FROM sqlite_master WHERE type='table' AND name='wars'")
+    found = cur.fetchone()[0] > 0
+    if found and schema is not None:
+        schema['wars'] = True
+    return found
+
+
+def cactus_rowid_is_key(conn) -> bool:
+    # True when a column declared INTEGER PRIMARY KEY aliases the rowid of
+    # wars: only then does VACUUM keep the rowids the backup deltas name
+    pk = [(col[2] or '').upper() for col in conn.execute("PRAGMA table_info(wars)") if col[5]]
+    return pk == ['INTEGER']
+
+
+def is_cactus_path(path: Path) -> bool:
+    return Path(path).suffix.lower() in CACTUS_SUFFIXES
+
+
+def format_lines(group: str, entries, cactus: bool):
+    lines = []
+    if cactus:
+        st = STATE_MAP.get(group, 1)
+        for nick, clan, reason in entries:
+            nick_q = quote_field(nick)
+            reason_q = quote_field(reason)
+            lines.append(f'INSERT INTO wars (name, state, reason) VALUES ({nick_q}, {st}, {reason_q});')
+    else:
+        for nick, clan, reason in entries:
+            nick_q = quote_field(nick)
+            clan_q = quote_field(clan)
+            reason_q = quote_field(reason)
+            line = f'add_war_entry {quote_field(group)} {nick_q} {clan_q} {reason_q}'
+            lines.append(line)
+    return lines
+
+
+# --- crash-safe appends ---
+# an append is first written to <file>.journal (JSON header with the base
+# size, payload length and sha256, then the payload), fsynced and renamed
+# into place. Only then is the payload appended to the cfg in one write and
+# fsynced, and the journal removed. A journal left behind by a crash is
+# replayed or discarded by recover_journal, so a half-written line never
+# survives and no full-file copy is needed for it.
+
+def journal_path(path: Path) -> Path:
+    return path.with_name(path.name + '.journal')
+
+
+def fsync_dir(path: Path):
+    if os.name != 'posix':
+        return
+    fd = os.open(str(path.parent), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_durable(path: Path, data: bytes, mode: str = 'wb'):
+    with path.open(mode) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def recover_journal(path: Path):
+    # returns None (no journal), 'discarded', 'stale', 'applied' or 'replayed'
+    import json
+    import hashlib
+    journal = journal_path(path)
+    if not journal.exists():
+        return None
+    header, _, payload = journal.read_bytes().partition(b'\n')
+    try:
+        meta = json.loads(header.decode('utf-8'))
+        complete = len(payload) == meta['length'] and hashlib.sha256(payload).hexdigest() == meta['sha256']
+    except (ValueError, KeyError, TypeError):
+        complete = False
+    if not complete:
+        # the crash hit the journal itself, the cfg was never touched
+        journal.unlink()
+        return 'discarded'
+    base = meta['base']
+    size = path.stat().st_size if path.exists() else 0
+    status = 'stale'
+    if size >= base:
+        with path.open('r+b' if path.exists() else 'w+b') as f:
+            f.seek(base)
+            current = f.read(len(payload))
+            if current == payload:
+                status = 'applied'
+            elif payload.startswith(current) and size == base + len(current):
+                f.write(payload[len(current):])
+                f.flush()
+                os.fsync(f.fileno())
+                status = 'replayed'
+    journal.unlink()
+    return status
+
+
+def append_lines(path: Path, lines):
+    # returns (offset, payload) of the appended bytes
+    payload = ''.join(ln + '\n' for ln in lines).encode('utf-8', errors='replace')
+    recover_journal(path)
+    if path.exists() and path.stat().st_size:
+        with path.open('rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                payload = b'\n' + payload
+    return append_bytes(path, payload), payload
+
+
+def append_bytes(path: Path, payload: bytes) -> int:
+    # journaled append of raw bytes; returns the offset they landed at
+    import json
+    import hashlib
+    recover_journal(path)
+    base = path.stat().st_size if path.exists() else 0
+    header = json.dumps({'base': base, 'length': len(payload), 'sha256': hashlib.sha256(payload).hexdigest()})
+    journal = journal_path(path)
+    tmp = journal.with_name(journal.name + '.tmp')
+    write_durable(tmp, header.encode('utf-8') + b'\n' + payload)
+    os.replace(str(tmp), str(journal))
+    fsync_dir(journal)
+    write_durable(path, payload, 'ab')
+    journal.unlink()
+    return base
+
+
+# legacy full copies (<file>.bak_YYYYMMDD_HHMMSS) from older versions are
+# still offered by undo when the backup store has nothing to revert
+
+def read_last_backup_meta(path: Path):
+    meta = path.with_name(path.name + '.last_backup')
+    if meta.exists():
+        try:
+            p = Path(meta.read_text(encoding='utf-8').strip())
+            if p.exists():
+                return p
+        except Exception:
+            return None
+    return None
+
+
+# --- jobs shared by the GUI worker pool and the CLI ---
+# long-running jobs take progress(done, total) and cancelled() callbacks and
+# hold the per-path lock while they touch the file, so two writes to the
+# same warlist never interleave.
+
+class BackupError(Exception):
+    pass
+
+
+class BackupConflictError(BackupError):
+    # the file no longer holds what an undo or redo step expects
+    pass
+
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+def path_lock(path):
+    key = os.path.normcase(os.path.abspath(str(path)))
+    with _path_locks_guard:
+        return _path_locks.setdefault(key, threading.RLock())
+
+
+def noop_progress(done, total):
+    pass
+
+
+def never_cancelled():
+    return False
+
+
+def iter_chunks(iterable, size: int):
+    # lists of up to size items, consumed lazily
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def split_valid(entries):
+    # invalid holds (nick, reason); an empty nick is a clan-only entry
+    entries = list(entries)
+    valid = []
+    invalid = []
+    for (nick, clan, reason), problem in zip(entries, check_nicks((e[0] for e in entries), allow_empty=True)):
+        if problem:
+            invalid.append((nick, problem))
+        else:
+            valid.append((nick, clan, reason))
+    return valid, invalid
+
+
+# --- file watcher ---
+# DDNet may rewrite the warlist while the editor is open. FileWatcher polls
+# os.stat of a few files from a daemon thread - a stat per file per second,
+# so idle cost is negligible and it works the same on every platform - and
+# calls on_change(paths) on that thread when a signature changes. Files the
+# editor is writing itself are skipped for the length of own_write(), and
+# the signatures that write left become their baseline; every other file,
+# and any job that only reads, stays watched.
+
+WATCH_INTERVAL = 1.0
+
+
+def file_signature(path: Path):
+    try:
+        st = os.stat(str(path))
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class FileWatcher:
+    def __init__(self, interval: float = WATCH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._paths = []
+        self._signatures = {}
+        self._on_change = None
+        self._writing = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, paths, on_change):
+        # replaces the watched files; the current state is the baseline
+        paths = [Path(p) for p in paths]
+        with self._lock:
+            self._paths = paths
+            self._signatures = {p: file_signature(p) for p in paths}
+            self._on_change = on_change
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='warlist-watcher', daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def _key(path) -> str:
+        return os.path.normcase(os.path.abspath(str(path)))
+
+    @contextmanager
+    def own_write(self, paths):
+        # paths are being written by us: not polled meanwhile, and what the
+        # write leaves is taken as their new state instead of reported
+        keys = [self._key(p) for p in paths]
+        with self._lock:
+            for key in keys:
+                self._writing[key] = self._writing.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                for key in keys:
+                    self._writing[key] -= 1
+                    if not self._writing[key]:
+                        del self._writing[key]
+                for p in self._paths:
+                    key = self._key(p)
+                    if key in keys and key not in self._writing:
+                        self._signatures[p] = file_signature(p)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval * 2)
+            self._thread = None
+
+    def poll(self):
+        # one check; returns the changed paths after reporting them
+        with self._lock:
+            changed = []
+            for p in self._paths:
+                if self._writing and self._key(p) in self._writing:
+                    continue
+                sig = file_signature(p)
+                if sig != self._signatures.get(p):
+                    self._signatures[p] = sig
+                    changed.append(p)
+            on_change = self._on_change
+        if changed and on_change is not None:
+            on_change(changed)
+        return changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                # a callback error must not end the watcher
+                pass
+
+
+# --- SQLite copies ---
+# Cactus databases are copied with the online backup API, never byte-wise:
+# a client holding the DB in WAL mode keeps committed pages in <db>-wal until
+# a checkpoint, and a file copy of <db> alone silently drops them. The API
+# reads through the WAL and writes through the destination's own journal,
+# in steps of CACTUS_BACKUP_PAGES so progress can be reported.
+
+CACTUS_BACKUP_PAGES = 1024
+CACTUS_SIDECARS = ('-wal', '-shm', '-journal')
+
+
+def cactus_sidecars(path: Path):
+    # present while a client has the DB open in WAL mode or after a crash
+    path = Path(path)
+    return [p for p in (path.with_name(path.name + suffix) for suffix in CACTUS_SIDECARS) if p.exists()]
+
+
+def cactus_copy(src: Path, dest: Path, progress=noop_progress, pages: int = CACTUS_BACKUP_PAGES):
+    import sqlite3
+    src_conn = cactus_connect_readonly(src)
+    try:
+        dest_conn = sqlite3.connect(str(dest))
+        try:
+            src_conn.backup(dest_conn, pages=pages,
+                            progress=lambda status, remaining, total: progress(total - remaining, total))
+        finally:
+            dest_conn.close()
+    finally:
+        src_conn.close()
+
+
+# --- import readers ---
+# every reader yields (lineno, row) where row is (group, nick, clan, reason)
+# with None for fields the input did not provide, or row=None for a line
+# that could not be parsed. Input is consumed lazily, line by line.
+
+IMPORT_FORMATS = ('nicks', 'csv', 'jsonl', 'cfg')
+_STATE_GROUPS = {v: k for k, v in STATE_MAP.items()}
+
+
+def guess_import_format(name: str) -> str:
+    suffix = Path(name).suffix.lower()
+    if suffix in ('.csv', '.tsv'):
+        return 'csv'
+    if suffix in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if suffix == '.cfg':
+        return 'cfg'
+    return 'nicks'
+
+
+def _group_value(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, int) or str(value).strip().isdigit():
+        return _STATE_GROUPS.get(int(value), '')
+    value = str(value).strip().lower()
+    return value if value in STATE_MAP else ''
+
+
+def iter_nick_rows(lines):
+    for lineno, raw in enumerate(lines, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        tokens = split_cfg_line(raw)
+        if tokens is None:
+            yield lineno, None
+            continue
+        for token in tokens:
+            yield lineno, (None, token, None, None)
+
+
+def iter_csv_rows(lines):
+    import csv
+    columns = None
+    for lineno, cells in enumerate(csv.reader(lines), 1):
+        cells = [c.strip() for c in cells]
+        if not any(cells):
+            continue
+        if columns is None:
+            head = [c.lower() for c in cells]
+            if head[0] in ('nick', 'name'):
+                columns = {name: i for i, name in enumerate(head)}
+                columns.setdefault('nick', columns.get('name'))
+                columns.setdefault('group', columns.get('state'))
+                continue
+            columns = {'nick': 0, 'clan': 1, 'reason': 2, 'group': 3}
+
+        def cell(name):
+            i = columns.get(name)
+            return cells[i] if i is not None and i < len(cells) else None
+
+        yield lineno, (_group_value(cell('group')), cell('nick') or '', cell('clan'), cell('reason'))
+
+
+def iter_jsonl_rows(lines):
+    import json
+    for lineno, raw in enumerate(lines, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            obj = json.loads(raw)
+        except ValueError:
+            yield lineno, None
+            continue
+        if isinstance(obj, str):
+            yield lineno, (None, obj, None, None)
+        elif isinstance(obj, dict):
+            nick = obj.get('nick', obj.get('name'))
+            group = obj.get('group', obj.get('state'))
+            clan = obj.get('clan')
+            reason = obj.get('reason')
+            yield lineno, (_group_value(group), str(nick or ''),
+                           None if clan is None else str(clan),
+                           None if reason is None else str(reason))
+        else:
+            yield lineno, None
+
+
+def iter_cfg_rows(lines):
+    # add_war_entry lines of another client's cfg; other commands are skipped
+    for lineno, raw in enumerate(lines, 1):
+        raw = raw.strip()
+        if not raw.startswith('add_war_entry'):
+            continue
+        parts = split_cfg_line(raw)
+        if not parts or len(parts) < 4 or parts[0] != 'add_war_entry':
+            yield lineno, None
+            continue
+        yield lineno, (_group_value(parts[1]), parts[2], parts[3], parts[4] if len(parts) > 4 else None)
+
+
+def iter_import_rows(lines, fmt: str):
+    readers = {'nicks': iter_nick_rows, 'csv': iter_csv_rows, 'jsonl': iter_jsonl_rows, 'cfg': iter_cfg_rows}
+    return readers[fmt](lines)
+
+
+def iter_import_entries(lines, fmt: str, group: str, clan: str, reason: str, cactus: bool, report):
+    # (group, nick, clan, reason) ready for apply_batch: defaults filled in,
+    # fields stripped, rows that cannot be written go to report(lineno, msg)
+    for lineno, row in iter_import_rows(lines, fmt):
+        if row is None:
+            report(lineno, 'cannot parse line')
+            continue
+        row_group, nick, row_clan, row_reason = row
+        row_group = group if row_group is None else row_group
+        row_clan = clan if row_clan is None else row_clan
+        row_reason = reason if row_reason is None else row_reason
+        nick = nick.strip()
+        if not row_group:
+            report(lineno, 'unknown group')
+        elif nick and nick_problem(nick):
+            report(lineno, f'invalid nick ({nick_problem(nick)}): {nick!r}')
+        elif not nick and (cactus or not row_clan):
+            report(lineno, 'empty nick')
+        else:
+            yield row_group, nick, '' if cactus else row_clan.strip(), row_reason.strip()
+
+
+# --- update check ---
+
+def parse_version_tag(tag: str):
+    if not tag:
+        return ()
+    tag = str(tag).lstrip('vV')
+    parts = tag.split('.')
+    nums = []
+    for p in parts:
+        try:
+            nums.append(int(p))
+        except Exception:
+            nums.append(0)
+    return tuple(nums)
+
+
+def check_github_latest(timeout=6):
+    import json
+    import urllib.request
+    import urllib.error
+    try:
+        req = urllib.request.Request(REPO_API_LATEST, headers={
+            'User-Agent': 'DDNet-Warlist-Editor-Updater'
+        })
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            raw = resp.read()
+            data = json.loads(raw.decode('utf-8', errors='replace'))
+            tag = data.get('tag_name') or data.get('name')
+            url = data.get('html_url') or REPO_PAGE
+            body = data.get('body') or ''
+            return True, {'tag_name': tag, 'html_url': url, 'body': body}
+    except urllib.error.HTTPError as e:
+        return False, f'HTTP error: {e.code} {e.reason}'
+    except urllib.error.URLError as e:
+        return False, f'Network error: {e.reason}'
+    except Exception as e:
+        return False, f'Unexpected error: {e}'
@@ -0,0 +1,1884 @@
+import time
+import shlex
+import threading
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+from PySide6.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, Signal, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QFont, QKeySequence, QShortcut, QColor
+from PySide6.QtWidgets import (
+    QWidget, QFileDialog, QVBoxLayout, QHBoxLayout,
+    QLabel, QLineEdit, QPlainTextEdit, QPushButton, QMessageBox, QRadioButton,
+    QComboBox, QGroupBox, QFormLayout, QCheckBox, QSizePolicy, QSpacerItem, QSplitter, QProgressBar,
+    QTabWidget, QTableView, QHeaderView, QAbstractItemView, QInputDialog
+)
+from warlist_core import (
+    __version__, REPO_PAGE, BackupConflictError, BackupError, FileWatcher, CACTUS_INDEX_NAME, cactus_db, cactus_find_lookup_index, cactus_optimize,
+    STATE_MAP, cactus_query_plan, format_timings, read_last_backup_meta, check_github_latest, parse_version_tag, path_lock,
+    split_valid, guess_import_format, iter_import_entries
+)
+from warlist_backends import (
+    STATUS_NEW, STATUS_DUPLICATE, STATUS_INVALID, EDIT_DELETE, EDIT_GROUP, EDIT_REASON, BACKENDS, classify_entries,
+    apply_to_targets, open_backend, sync_backends
+)
+from warlist_backup import BackupStore
+from warlist_browse import PAGE_SIZE as BROWSE_PAGE_SIZE, entry_index
+from warlist_similar import similarity_index
+
+# TRANSLATIONS kept identical to original for brevity
+TRANSLATIONS = {
+    "en": {
+        "title": "DDNet Warlist Editor",
+        "client": "Client:",
+        "path": "File path:",
+        "choose_file": "Choose file...",
+        "mode": "Mode",
+        "single": "Single entry",
+        "multi": "Multiple entries",
+        "nick": "Nick:",
+        "clan": "Clan:",
+        "reason": "Reason:",
+        "multi_hint": 'Split nicks by spaces. Quotes preserved. Example: "King 1 fps?" AKIrA R6 "papa kar"',
+        "multi_reason_label": "Reason for all:",
+        "multi_clan_label": "Clan (optional for all):",
+        "group": "Group:",
+        "backup": "Create backup before write",
+        "preview": "Preview",
+        "add": "Add",
+        "add_many": "Add to several...",
+        "add_many_hint": "Write the same entries to several warlists (other profiles, Tater cfg and Cactus databases) at once",
+        "add_many_targets": "Write to these files?",
+        "undo": "Undo last backup",
+        "check_updates": "Check updates",
+        "import": "Import...",
+        "import_hint": "Stream nicks from a CSV, JSONL, nick list or another client's cfg into the warlist",
+        "import_filter": "Warlists (*.txt *.csv *.tsv *.jsonl *.ndjson *.json *.cfg);;All Files (*)",
+        "import_same_file": "The import file is the warlist itself.",
+        "sync": "Sync...",
+        "sync_hint": "Copy missing entries between this warlist and another Tater cfg or Cactus database",
+        "sync_filter": "Warlists (*.cfg *.txt *.sqlite3 *.db *.sqlite);;All Files (*)",
+        "sync_direction": "Copy the entries missing from the other file, or both ways?",
+        "sync_export": "Export only",
+        "sync_both": "Both ways",
+        "sync_same_file": "Choose a different file to sync with.",
+        "optimize_db": "Optimize DB",
+        "optimize_db_hint": "Create an index on wars (lower(name), state) to speed up duplicate checks",
+        "compact": "Compact",
+        "compact_hint": "Remove duplicate entries, keeping the first of each nick",
+        "compact_nothing": "No duplicate entries found.",
+        "similar": "Similar nicks",
+        "similar_hint": "Flag new nicks that look like existing ones (K1ng, King., Kiing) in the preview",
+        "log_preview": "Log / Preview:",
+        "footer_hint": "Hint: close DDNet before writing.",
+        "byline": "By Ap4k - Tater/Cactus support",
+        "ok": "OK",
+        "cancel": "Cancel",
+        "error": "Error",
+        "confirm_continue": "Make sure DDNet (tclient/cactus) is closed. Continue?",
+        "race_warning": "The file was changed by another program {seconds} s ago - DDNet seems to be running "
+                        "and may overwrite this write.",
+        "preview_stale": "The preview is out of date: the file changed after it was built.",
+        "no_file": "File not specified",
+        "nothing_to_write": "Nothing to write",
+        "done": "Done",
+        "update_available": "Update available",
+        "update_open_repo": "Open repository?",
+        "validation_invalid_nicks": "Invalid nicks found (remove or fix):",
+        "validation_skipped_invalid": "Invalid nicks - skipped:",
+        "nick_empty": "empty",
+        "nick_too_long": "longer than 64 characters",
+        "nick_control_char": "control character",
+        "create_backup_failed": "Failed to create backup:",
+        "undo_no_backup": "Backup not found - nothing to undo.",
+        "undo_file_missing": "File not found, cannot undo.",
+        "undo_confirm": "Restore from backup",
+        "undo_delta_confirm": "Revert this write",
+        "redo": "Redo",
+        "redo_nothing": "Nothing to redo.",
+        "history": "History",
+        "history_empty": "No recorded writes yet.",
+        "restore_base": "Base copy",
+        "restore_base_hint": "Put back the full copy taken before the oldest write in the history; the writes can be redone",
+        "restore_base_confirm": "Restore the file as it was before the oldest write in the history?",
+        "restore_base_missing": "There is no base copy for this file yet.",
+        "preview_no_nicks_or_clan": "Multiple nicks empty (or provide a clan).",
+        "language": "Language:",
+        "theme": "Theme:",
+        "theme_dark": "Dark",
+        "theme_light": "Light",
+        "tab_log": "Log",
+        "tab_preview": "Preview",
+        "filter": "Filter by nick, clan or reason",
+        "tab_browse": "Entries",
+        "browse_search": "Search nick, clan or reason",
+        "browse_prefix": "Starts with",
+        "browse_count": "{count} entries",
+        "browse_delete": "Delete",
+        "browse_regroup": "Move to group...",
+        "browse_reason": "Set reason...",
+        "browse_nothing_selected": "Select entries in the list first.",
+        "browse_confirm_delete": "Delete {count} selected entries?",
+        "browse_confirm_group": "Move {count} selected entries to {value}?",
+        "browse_confirm_reason": "Set the reason of {count} selected entries to \"{value}\"?",
+        "status_all": "All",
+        "status_new": "New",
+        "status_duplicate": "Duplicate",
+        "status_invalid": "Invalid",
+        "col_nick": "Nick",
+        "col_clan": "Clan",
+        "col_reason": "Reason",
+        "col_group": "Group",
+        "col_status": "Status",
+        "col_similar": "Similar to",
+        "settings": "Settings"
+    },
+    "ru": {
+        "title": "DDNet Warlist Editor",
+        "client": "Клиент:",
+        "path": "Путь к файлу:",
+        "choose_file": "Выбрать файл...",
+        "mode": "Режим",
+        "single": "Одиночная запись",
+        "multi": "Множественная запись",
+        "nick": "Ник:",
+        "clan": "Клан:",
+        "reason": "Причина:",
+        "multi_hint": 'Разделяй ники пробелами. Кавычки сохраняются. Например: "King 1 fps?" AKIrA R6 "papa kar"',
+        "multi_reason_label": "Причина для всех:",
+        "multi_clan_label": "Клан (опционально для всех):",
+        "group": "Группа:",
+        "backup": "Создавать резервную копию перед записью",
+        "preview": "Предпросмотр",
+        "add": "Добавить",
+        "add_many": "Добавить в несколько...",
+        "add_many_hint": "Записать те же записи сразу в несколько списков (другие профили, cfg Tater и базы Cactus)",
+        "add_many_targets": "Записать в эти файлы?",
+        "undo": "Откат последней резервной копии",
+        "check_updates": "Проверить обновления",
+        "import": "Импорт...",
+        "import_hint": "Потоково добавить ники из CSV, JSONL, списка ников или cfg другого клиента",
+        "import_filter": "Списки (*.txt *.csv *.tsv *.jsonl *.ndjson *.json *.cfg);;Все файлы (*)",
+        "import_same_file": "Файл импорта совпадает с редактируемым файлом.",
+        "sync": "Синхронизация...",
+        "sync_hint": "Скопировать недостающие записи между этим списком и другим cfg Tater или базой Cactus",
+        "sync_filter": "Списки (*.cfg *.txt *.sqlite3 *.db *.sqlite);;Все файлы (*)",
+        "sync_direction": "Скопировать недостающие записи только в другой файл или в обе стороны?",
+        "sync_export": "Только экспорт",
+        "sync_both": "В обе стороны",
+        "sync_same_file": "Выберите другой файл для синхронизации.",
+        "optimize_db": "Оптимизировать БД",
+        "optimize_db_hint": "Создать индекс wars (lower(name), state) для быстрой проверки дубликатов",
+        "compact": "Сжать",
+        "compact_hint": "Удалить повторяющиеся записи, оставив первую для каждого ника",
+        "compact_nothing": "Повторяющихся записей не найдено.",
+        "similar": "Похожие ники",
+        "similar_hint": "Отмечать в предпросмотре новые ники, похожие на уже существующие (K1ng, King., Kiing)",
+        "log_preview": "Лог / Предпросмотр:",
+        "footer_hint": "Подсказка: закройте DDNet перед записью.",
+        "byline": "By Ap4k - поддержка Tater/Cactus",
+        "ok": "OK",
+        "cancel": "Отмена",
+        "error": "Ошибка",
+        "confirm_continue": "Убедитесь, что DDNet (tclient/cactus) закрыт. Продолжить запись?",
+        "race_warning": "Файл изменён другой программой {seconds} с назад - похоже, DDNet запущен "
+                        "и может перезаписать изменения.",
+        "preview_stale": "Предпросмотр устарел: файл изменился после его построения.",
+        "no_file": "Файл не указан",
+        "nothing_to_write": "Нечего записывать",
+        "done": "Готово",
+        "update_available": "Доступно обновление",
+        "update_open_repo": "Открыть репозиторий?",
+        "validation_invalid_nicks": "Найдены невалидные ники (удалите или исправьте):",
+        "validation_skipped_invalid": "Найдены невалидные ники - они будут пропущены:",
+        "nick_empty": "пустой",
+        "nick_too_long": "длиннее 64 символов",
+        "nick_control_char": "управляющий символ",
+        "create_backup_failed": "Не удалось создать резервную копию:",
+        "undo_no_backup": "Резервная копия не найдена - нечего не откатывается.",
+        "undo_file_missing": "Файл не найден, невозможно откатить.",
+        "undo_confirm": "Восстановить из резервной копии",
+        "undo_delta_confirm": "Отменить эту запись",
+        "redo": "Повторить",
+        "redo_nothing": "Нечего повторять.",
+        "history": "История",
+        "history_empty": "Записей в истории пока нет.",
+        "restore_base": "Базовая копия",
+        "restore_base_hint": "Вернуть полную копию, снятую до самой старой записи в истории; записи можно повторить",
+        "restore_base_confirm": "Вернуть файл к состоянию до самой старой записи в истории?",
+        "restore_base_missing": "Базовой копии для этого файла пока нет.",
+        "preview_no_nicks_or_clan": "Поле множественных ников пустое (либо заполните ники, либо укажите клан).",
+        "language": "Язык:",
+        "theme": "Тема:",
+        "theme_dark": "Тёмная",
+        "theme_light": "Светлая",
+        "tab_log": "Лог",
+        "tab_preview": "Предпросмотр",
+        "filter": "Фильтр по нику, клану или причине",
+        "tab_browse": "Записи",
+        "browse_search": "Поиск по нику, клану или причине",
+        "browse_prefix": "С начала",
+        "browse_count": "Записей: {count}",
+        "browse_delete": "Удалить",
+        "browse_regroup": "В группу...",
+        "browse_reason": "Причина...",
+        "browse_nothing_selected": "Сначала выделите записи в списке.",
+        "browse_confirm_delete": "Удалить выделенные записи ({count})?",
+        "browse_confirm_group": "Перенести выделенные записи ({count}) в {value}?",
+        "browse_confirm_reason": "Заменить причину у выделенных записей ({count}) на \"{value}\"?",
+        "status_all": "Все",
+        "status_new": "Новая",
+        "status_duplicate": "Дубликат",
+        "status_invalid": "Невалидный",
+        "col_nick": "Ник",
+        "col_clan": "Клан",
+        "col_reason": "Причина",
+        "col_group": "Группа",
+        "col_status": "Статус",
+        "col_similar": "Похож на",
+        "settings": "Настройки"
+    }
+}
+
+
+def t(key: str, lang: str = "en") -> str:
+    return TRANSLATIONS.get(lang, TRANSLATIONS["en"]).get(key, key)
+
+
+# --- log ---
+
+class LogSink(QObject):
+    # post() is safe from any thread: lines are queued and the GUI thread
+    # drains them on a short timer, appending each batch as one block.
+    # Both the queue and the view are capped, the oldest lines go first.
+    MAX_LINES = 10000
+    FLUSH_MS = 40
+    FLUSH_BATCH = 2000
+    _wake = Signal()
+
+    def __init__(self, view: QPlainTextEdit):
+        super().__init__(view)
+        self.view = view
+        self.view.setMaximumBlockCount(self.MAX_LINES)
+        self._pending = deque(maxlen=self.MAX_LINES)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.FLUSH_MS)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._timer.start)
+
+    def post(self, text: str):
+        lines = str(text).split('\n')
+        with self._lock:
+            was_empty = not self._pending
+            overflow = len(self._pending) + len(lines) - self.MAX_LINES
+            if overflow > 0:
+                self._dropped += overflow
+            self._pending.extend(lines)
+        if was_empty:
+            self._wake.emit()
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._dropped = 0
+        self.view.clear()
+
+    def flush(self):
+        with self._lock:
+            batch = []
+            if self._dropped:
+                batch.append(f'... {self._dropped} строк лога пропущено')
+                self._dropped = 0
+            while self._pending and len(batch) < self.FLUSH_BATCH:
+                batch.append(self._pending.popleft())
+            if not self._pending:
+                self._timer.stop()
+        if batch:
+            self.view.appendPlainText('\n'.join(batch))
+
+
+# --- preview ---
+
+class PreviewModel(QAbstractTableModel):
+    # rows are (nick, clan, reason, group, status, similar) tuples; the view
+    # only asks for what is on screen. Filtering keeps a list of row indices
+    # instead of copying rows.
+    COLUMNS = ('col_nick', 'col_clan', 'col_reason', 'col_group', 'col_status', 'col_similar')
+    SIMILAR_COLOR = '#d29922'
+    STATUS_COLORS = {STATUS_NEW: '#3fb950', STATUS_DUPLICATE: '#d29922', STATUS_INVALID: '#f85149'}
+
+    def __init__(self, lang: str, parent=None):
+        super().__init__(parent)
+        self.lang = lang
+        self._rows = []
+        self._visible = None
+        self._haystack = None
+        self._text = ''
+        self._status = None
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = rows
+        self._haystack = None
+        self._apply_filter()
+        self.endResetModel()
+
+    def set_filter(self, text: str, status):
+        self.beginResetModel()
+        self._text = text.strip().casefold()
+        self._status = status
+        self._apply_filter()
+        self.endResetModel()
+
+    def set_lang(self, lang: str):
+        self.lang = lang
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self.COLUMNS) - 1)
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 4), self.index(self.rowCount() - 1, 4))
+
+    def _apply_filter(self):
+        text, status = self._text, self._status
+        if not text and status is None:
+            self._visible = None
+            return
+        rows = self._rows
+        candidates = range(len(rows)) if status is None else [i for i, r in enumerate(rows) if r[4] == status]
+        if text:
+            if self._haystack is None:
+                self._haystack = [f'{r[0]}\t{r[1]}\t{r[2]}'.casefold() for r in rows]
+            hay = self._haystack
+            candidates = [i for i in candidates if text in hay[i]]
+        self._visible = list(candidates)
+
+    def row(self, i: int):
+        return self._rows[i if self._visible is None else self._visible[i]]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._visible is None else len(self._visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.row(index.row())
+        col = index.column()
+        if role == Qt.DisplayRole:
+            if col == 4:
+                return t('status_' + row[4], self.lang)
+            return row[col]
+        if role == Qt.ForegroundRole and col == 4:
+            return QColor(self.STATUS_COLORS[row[4]])
+        if role == Qt.ForegroundRole and col == 5:
+            return QColor(self.SIMILAR_COLOR)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return t(self.COLUMNS[section], self.lang)
+        return section + 1
+
+
+class BrowserModel(QAbstractTableModel):
+    # existing entries, fetched a page at a time from an EntryIndex as the
+    # view scrolls (canFetchMore/fetchMore); a new query drops the loaded
+    # rows and asks for the first page only. Rows are
+    # (ref, group, nick, clan, reason).
+    COLUMNS = ('col_nick', 'col_clan', 'col_reason', 'col_group')
+    FIELDS = (2, 3, 4, 1)
+
+    def __init__(self, lang: str, parent=None):
+        super().__init__(parent)
+        self.lang = lang
+        self.entries = None
+        self._rows = []
+        self._done = True
+        self._query = ('', None, False)
+
+    def set_index(self, entries):
+        if self.entries is not None and self.entries is not entries:
+            self.entries.close()
+        self.entries = entries
+        self._reload()
+
+    def set_query(self, text: str, group, prefix: bool):
+        self._query = (text.strip(), group, prefix)
+        self._reload()
+
+    def set_lang(self, lang: str):
+        self.lang = lang
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self.COLUMNS) - 1)
+
+    def _reload(self):
+        self.beginResetModel()
+        self._rows = []
+        self._done = self.entries is None
+        if not self._done:
+            self._rows = self.entries.page(*self._query)
+            self._done = len(self._rows) < BROWSE_PAGE_SIZE
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._done
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._done:
+            return
+        page = self.entries.page(*self._query, after=self._rows[-1][0] if self._rows else -1)
+        self._done = len(page) < BROWSE_PAGE_SIZE
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    def entry(self, i: int):
+        return self._rows[i]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self._rows[index.row()][self.FIELDS[index.column()]]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return t(self.COLUMNS[section], self.lang)
+        return section + 1
+
+
+# --- background tasks ---
+# disk and SQLite work runs on a QThreadPool; results travel back to the GUI
+# thread through queued signals. Every job takes progress/cancelled keyword
+# callbacks, writes hold the per-path lock from warlist_core.
+
+class TaskSignals(QObject):
+    # done, total (0 when unknown) and done per second since the start
+    progress = Signal(int, int, float)
+    result = Signal(object)
+    error = Signal(object)
+    finished = Signal(object)
+
+
+class Task(QRunnable):
+    PROGRESS_INTERVAL = 0.05
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        # context the job runs in, e.g. FileWatcher.own_write
+        self.writing = None
+        self.signals = TaskSignals()
+        self._cancel = threading.Event()
+        self._last_progress = 0.0
+        self._started = time.monotonic()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _progress(self, done, total):
+        # throttled so a 100k-row job cannot flood the event loop
+        now = time.monotonic()
+        if (total and done >= total) or now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.signals.progress.emit(done, total, done / max(now - self._started, 1e-6))
+
+    def run(self):
+        try:
+            with self.writing if self.writing is not None else nullcontext():
+                result = self.fn(*self.args, progress=self._progress, cancelled=self.is_cancelled)
+        except Exception as e:
+            self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit(self)
+
+
+IMPORT_LOG_LIMIT = 200
+
+
+def _browse_job(backend, progress, cancelled):
+    # None when cancelled; an unchanged file returns the index built before
+    return entry_index(backend, progress, cancelled)
+
+
+def _preview_job(backend, group, entries, similar, progress, cancelled):
+    rows = classify_entries(backend, group, entries)
+    counts = {STATUS_NEW: 0, STATUS_DUPLICATE: 0, STATUS_INVALID: 0}
+    for row in rows:
+        counts[row[4]] += 1
+    result = {'similar': None}
+    index = similarity_index(backend) if similar and backend is not None and backend.path.exists() else None
+    if index is not None:
+        # only new rows are worth a look; duplicates and invalid nicks are
+        # skipped on write anyway
+        flagged = 0
+        marked = []
+        for row in rows:
+            found = index.matches(row[0]) if row[4] == STATUS_NEW else ()
+            if found:
+                flagged += 1
+            marked.append(row + (', '.join(f'{name} ({d})' for d, name in found),))
+        rows = marked
+        result['similar'] = flagged
+    else:
+        rows = [row + ('',) for row in rows]
+    result.update(rows=rows, counts=counts, timings=backend.take_timings() if backend is not None else [])
+    return result
+
+
+def _add_job(backend, group, entries, backup, progress, cancelled):
+    valid, invalid = split_valid(entries)
+    result = {'invalid': invalid, 'path': backend.path, 'nothing': not valid,
+              'sidecars': [p.name for p in backend.sidecars()]}
+    if valid:
+        store = BackupStore.for_backend(backend) if backup else None
+        rows = [(group, nick, clan, reason) for nick, clan, reason in valid]
+        result.update(backend.apply_batch(rows, store=store, progress=progress, cancelled=cancelled))
+    result['timings'] = backend.take_timings()
+    return result
+
+
+def _add_many_job(targets, group, entries, backup, progress, cancelled):
+    # validated once, then written to every target in parallel
+    valid, invalid = split_valid(entries)
+    result = {'invalid': invalid, 'nothing': not valid, 'targets': []}
+    if valid:
+        rows = [(group, nick, clan, reason) for nick, clan, reason in valid]
+        result['targets'] = apply_to_targets(targets, rows, store_for=BackupStore.for_backend if backup else None,
+                                             progress=progress, cancelled=cancelled)
+    return result
+
+
+def _import_job(backend, source, group, clan, reason, backup, progress, cancelled):
+    # the file goes through reader -> validation -> apply_batch as a
+    # generator, so only one chunk of rows is held at a time
+    fmt = guess_import_format(source.name)
+    result = {'source': source, 'format': fmt, 'rejected': 0, 'rejected_lines': [], 'path': backend.path,
+              'sidecars': [p.name for p in backend.sidecars()]}
+
+    def report(lineno, msg):
+        result['rejected'] += 1
+        if len(result['rejected_lines']) < IMPORT_LOG_LIMIT:
+            result['rejected_lines'].append(f'{lineno}: {msg}')
+
+    store = BackupStore.for_backend(backend) if backup else None
+    started = time.monotonic()
+    with source.open(encoding='utf-8', errors='replace', newline='') as f:
+        entries = iter_import_entries(f, fmt, group, clan, reason, backend.cactus, report)
+        result.update(backend.apply_batch(entries, store=store, progress=progress, cancelled=cancelled,
+                                          skipped_limit=IMPORT_LOG_LIMIT))
+    result['seconds'] = time.monotonic() - started
+    result['rows'] = result['added'] + result['skipped'] + result['rejected']
+    result['timings'] = backend.take_timings()
+    return result
+
+
+def _sync_job(source, target_path, both, backup, progress, cancelled):
+    # the other file's client is picked by its extension
+    target = open_backend(target_path)
+    stores = {}
+    if backup:
+        stores = {'source_store': BackupStore.for_backend(source), 'target_store': BackupStore.for_backend(target)}
+    result = sync_backends(source, target, both=both, progress=progress, cancelled=cancelled, **stores)
+    result['source'] = source.path
+    result['target'] = target.path
+    result['timings'] = source.take_timings() + target.take_timings()
+    return result
+
+
+def _update_job(progress, cancelled):
+    return check_github_latest()
+
+
+def _undo_job(backend, bak, progress, cancelled):
+    # bak is a legacy full copy; without one the latest write is reverted
+    if bak is None:
+        store = BackupStore.for_backend(backend)
+        bak = ', '.join(store.describe(entry) for entry in store.undo(1))
+    else:
+        backend.restore(bak, progress)
+    return {'backup': bak, 'path': backend.path}
+
+
+def _redo_job(backend, progress, cancelled):
+    store = BackupStore.for_backend(backend)
+    return {'entries': [store.describe(entry) for entry in store.redo(1)], 'path': backend.path}
+
+
+def _restore_base_job(backend, progress, cancelled):
+    store = BackupStore.for_backend(backend)
+    reverted = store.restore_base(progress)
+    return {'entries': [store.describe(entry) for entry in reverted], 'base': store.base_path, 'path': backend.path}
+
+
+def _compact_job(backend, backup, progress, cancelled):
+    store = BackupStore.for_backend(backend) if backup else None
+    result = backend.compact(store=store, progress=progress, cancelled=cancelled)
+    result['path'] = backend.path
+    result['timings'] = backend.take_timings()
+    return result
+
+
+def _edit_job(backend, targets, action, value, backup, progress, cancelled):
+    store = BackupStore.for_backend(backend) if backup else None
+    result = backend.edit_entries(targets, action, value, store=store, progress=progress, cancelled=cancelled)
+    result.update(action=action, value=value, path=backend.path, timings=backend.take_timings())
+    return result
+
+
+def _optimize_job(file_path, backup, progress, cancelled):
+    result = {'base': None}
+    store = BackupStore(file_path, cactus=True) if backup else None
+    with path_lock(file_path):
+        with cactus_db.connection(file_path, create=True) as conn:
+            if not cactus_find_lookup_index(conn) and store is not None and store.ensure_base():
+                result['base'] = store.base_path
+            result['name'], result['created'] = cactus_optimize(conn)
+            result['plan'] = cactus_query_plan(conn)
+        if result['created'] and store is not None:
+            store.record_sql([f"CREATE INDEX IF NOT EXISTS {CACTUS_INDEX_NAME} ON wars (lower(name), state)"],
+                             [f"DROP INDEX IF EXISTS {CACTUS_INDEX_NAME}"])
+    return result
+
+
+# --- Redesigned UI ---
+class WarlistEditor(QWidget):
+    # an outside write this recent makes a write ask twice
+    RACE_WINDOW = 120
+    BROWSE_TAB = 2
+    # emitted from the watcher thread, delivered on the GUI thread
+    _external_change = Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.lang = "ru"
+        self.theme = "dark"
+        self.setWindowTitle(f'{t("title", self.lang)} - {__version__}')
+        self.resize(1100, 750)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(4)
+        self._tasks = set()
+        self.watcher = FileWatcher()
+        self._last_external_change = None
+        self._preview_built = False
+        self._preview_stale = False
+        self._external_change.connect(self._on_external_change)
+        self._build_ui()
+        # network check starts once the event loop runs, after the first paint
+        QTimer.singleShot(0, lambda: self._start_task(self._on_bg_update_checked, _update_job))
+
+    def _build_ui(self):
+        # top-level layout
+        root = QVBoxLayout(self)
+        root.setContentsMargins(10, 10, 10, 10)
+        root.setSpacing(8)
+
+        # header area: title + quick actions
+        header = QHBoxLayout()
+        title = QLabel(t('title', self.lang))
+        # slightly smaller title for compactness
+        title.setFont(QFont('Segoe UI', 16, QFont.Bold))
+        title.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        header.addWidget(title)
+
+        ver = QLabel(__version__)
+        ver.setToolTip('Version')
+        ver.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        ver.setFixedWidth(48)
+        header.addWidget(ver)
+
+        # compact settings area: smaller height, stacked compact controls
+        settings_box = QWidget()
+        settings_layout = QVBoxLayout()
+        settings_layout.setContentsMargins(4, 4, 4, 4)
+        settings_layout.setSpacing(4)
+        settings_box.setLayout(settings_layout)
+        settings_box.setFixedHeight(56)
+
+        # top row: small labels for context (optional)
+        top_row = QHBoxLayout()
+        top_row.setContentsMargins(0, 0, 0, 0)
+        top_row.setSpacing(6)
+        top_row.addStretch()
+        settings_layout.addLayout(top_row)
+
+        # bottom row: compact combos aligned to the right
+        bottom_row = QHBoxLayout()
+        bottom_row.setContentsMargins(0, 0, 0, 0)
+        bottom_row.setSpacing(6)
+
+        lbl_lang = QLabel(t('language', self.lang))
+        lbl_lang.setFixedHeight(20)
+        bottom_row.addWidget(lbl_lang)
+        self.lang_combo = QComboBox()
+        self.lang_combo.addItems(["Русский", "English"])
+        self.lang_combo.setCurrentIndex(0 if self.lang == 'ru' else 1)
+        self.lang_combo.currentIndexChanged.connect(self._on_language_changed)
+        self.lang_combo.setFixedWidth(120)
+        self.lang_combo.setFixedHeight(24)
+        bottom_row.addWidget(self.lang_combo)
+
+        lbl_theme = QLabel(t('theme', self.lang))
+        lbl_theme.setFixedHeight(20)
+        bottom_row.addWidget(lbl_theme)
+        self.theme_combo = QComboBox()
+        self.theme_combo.addItems([t('theme_dark', self.lang), t('theme_light', self.lang)])
+        self.theme_combo.setCurrentIndex(0 if self.theme == 'dark' else 1)
+        self.theme_combo.currentIndexChanged.connect(self._on_theme_changed)
+        self.theme_combo.setFixedWidth(120)
+        self.theme_combo.setFixedHeight(24)
+        bottom_row.addWidget(self.theme_combo)
+
+        bottom_row.addStretch()
+        settings_layout.addLayout(bottom_row)
+
+        # give settings a compact visual separation
+        header.addWidget(settings_box)
+
+        root.addLayout(header)
+
+        # central area: left form, right log/preview split
+        splitter = QSplitter(Qt.Horizontal)
+
+        # left panel - compact form
+        left_widget = QWidget()
+        left_layout = QVBoxLayout()
+        left_layout.setContentsMargins(6, 6, 6, 6)
+        left_layout.setSpacing(10)
+
+        # file / client row
+        file_group = QGroupBox()
+        file_layout = QHBoxLayout()
+        file_layout.setContentsMargins(6, 6, 6, 6)
+        file_layout.setSpacing(8)
+
+        self.lbl_client = QLabel(t('client', self.lang))
+        file_layout.addWidget(self.lbl_client)
+        self.client_combo = QComboBox()
+        self.client_combo.addItems(['Tater Client', 'Cactus Client'])
+        self.client_combo.currentIndexChanged.connect(self._on_client_changed)
+        file_layout.addWidget(self.client_combo)
+
+        file_layout.addStretch()
+        self.lbl_path = QLabel(t('path', self.lang))
+        file_layout.addWidget(self.lbl_path)
+        self.path_edit = QLineEdit()
+        self.path_edit.editingFinished.connect(self._on_path_changed)
+        self._set_path_placeholder()
+        file_layout.addWidget(self.path_edit, stretch=2)
+        self.browse_btn = QPushButton(t('choose_file', self.lang))
+        self.browse_btn.clicked.connect(self.browse_file)
+        self.browse_btn.setFixedHeight(28)
+        file_layout.addWidget(self.browse_btn)
+        file_group.setLayout(file_layout)
+        left_layout.addWidget(file_group)
+
+        # mode selection
+        mode_box = QGroupBox(t('mode', self.lang))
+        mode_layout = QHBoxLayout()
+        self.single_radio = QRadioButton(t('single', self.lang))
+        self.multi_radio = QRadioButton(t('multi', self.lang))
+        self.single_radio.setChecked(True)
+        self.single_radio.toggled.connect(self._update_mode)
+        mode_layout.addWidget(self.single_radio)
+        mode_layout.addWidget(self.multi_radio)
+        mode_layout.addStretch()
+        mode_box.setLayout(mode_layout)
+        left_layout.addWidget(mode_box)
+
+        # stacked-like area: single / multi
+        # single
+        single_box = QGroupBox(t('single', self.lang))
+        single_form = QFormLayout()
+        self.single_nick = QLineEdit()
+        self.single_nick.setPlaceholderText(t('nick', self.lang) + ' (например: Player123)')
+        self.single_clan = QLineEdit()
+        self.single_clan.setPlaceholderText(t('clan', self.lang))
+        self.single_reason = QLineEdit()
+        self.single_reason.setPlaceholderText(t('reason', self.lang))
+        single_form.addRow(QLabel(t('nick', self.lang)), self.single_nick)
+        single_form.addRow(QLabel(t('clan', self.lang)), self.single_clan)
+        single_form.addRow(QLabel(t('reason', self.lang)), self.single_reason)
+        single_box.setLayout(single_form)
+        left_layout.addWidget(single_box)
+
+        # multi
+        multi_box = QGroupBox(t('multi', self.lang))
+        multi_v = QVBoxLayout()
+        multi_top = QHBoxLayout()
+        self.multi_text = QPlainTextEdit()
+        self.multi_text.setPlaceholderText(t('multi_hint', self.lang))
+        self.multi_text.setFixedHeight(110)
+        self.multi_text.textChanged.connect(self._on_multi_text_changed)
+        multi_top.addWidget(self.multi_text, stretch=3)
+
+        right_col = QVBoxLayout()
+        self.multi_reason = QLineEdit()
+        self.multi_reason.setPlaceholderText(t('reason', self.lang))
+        right_col.addWidget(QLabel(t('multi_reason_label', self.lang)))
+        right_col.addWidget(self.multi_reason)
+        right_col.addSpacing(6)
+        right_col.addWidget(QLabel(t('multi_clan_label', self.lang)))
+        self.multi_clan = QLineEdit()
+        self.multi_clan.setPlaceholderText(t('multi_clan_label', self.lang))
+        self.multi_clan.textChanged.connect(self._on_multi_clan_changed)
+        right_col.addWidget(self.multi_clan)
+        right_col.addStretch()
+        multi_top.addLayout(right_col, stretch=1)
+
+        multi_v.addLayout(multi_top)
+        multi_box.setLayout(multi_v)
+        left_layout.addWidget(multi_box)
+
+        # options + buttons row
+        opts = QHBoxLayout()
+        self.lbl_group = QLabel(t('group', self.lang))
+        opts.addWidget(self.lbl_group)
+        self.group_box = QComboBox()
+        self.group_box.addItems(['enemy', 'team'])
+        opts.addWidget(self.group_box)
+        self.backup_checkbox = QCheckBox(t('backup', self.lang))
+        self.backup_checkbox.setChecked(True)
+        opts.addWidget(self.backup_checkbox)
+        self.similar_checkbox = QCheckBox(t('similar', self.lang))
+        self.similar_checkbox.setToolTip(t('similar_hint', self.lang))
+        opts.addWidget(self.similar_checkbox)
+        opts.addStretch()
+
+        # action buttons with larger sizes
+        self.preview_btn = QPushButton(t('preview', self.lang))
+        self.preview_btn.clicked.connect(self.preview)
+        self.preview_btn.setFixedHeight(34)
+        self.add_btn = QPushButton(t('add', self.lang))
+        self.add_btn.clicked.connect(self.add_to_file)
+        self.add_btn.setFixedHeight(34)
+        self.add_many_btn = QPushButton(t('add_many', self.lang))
+        self.add_many_btn.setToolTip(t('add_many_hint', self.lang))
+        self.add_many_btn.clicked.connect(self.add_to_many)
+        self.import_btn = QPushButton(t('import', self.lang))
+        self.import_btn.setToolTip(t('import_hint', self.lang))
+        self.import_btn.clicked.connect(self.import_file)
+        self.sync_btn = QPushButton(t('sync', self.lang))
+        self.sync_btn.setToolTip(t('sync_hint', self.lang))
+        self.sync_btn.clicked.connect(self.sync_file)
+        self.undo_btn = QPushButton(t('undo', self.lang))
+        self.undo_btn.clicked.connect(self.undo_last)
+        self.redo_btn = QPushButton(t('redo', self.lang))
+        self.redo_btn.clicked.connect(self.redo_last)
+        self.history_btn = QPushButton(t('history', self.lang))
+        self.history_btn.clicked.connect(self.show_history)
+        self.restore_base_btn = QPushButton(t('restore_base', self.lang))
+        self.restore_base_btn.setToolTip(t('restore_base_hint', self.lang))
+        self.restore_base_btn.clicked.connect(self.restore_base)
+        self.update_btn = QPushButton(t('check_updates', self.lang))
+        self.update_btn.clicked.connect(lambda: self._start_task(self._on_update_checked, _update_job))
+        self.optimize_btn = QPushButton(t('optimize_db', self.lang))
+        self.optimize_btn.setToolTip(t('optimize_db_hint', self.lang))
+        self.optimize_btn.clicked.connect(self.optimize_db)
+        self.compact_btn = QPushButton(t('compact', self.lang))
+        self.compact_btn.setToolTip(t('compact_hint', self.lang))
+        self.compact_btn.clicked.connect(self.compact_file)
+
+        opts.addWidget(self.preview_btn)
+        opts.addWidget(self.add_btn)
+        opts.addWidget(self.add_many_btn)
+        opts.addWidget(self.import_btn)
+        opts.addWidget(self.sync_btn)
+        opts.addWidget(self.undo_btn)
+        opts.addWidget(self.redo_btn)
+        opts.addWidget(self.history_btn)
+        opts.addWidget(self.restore_base_btn)
+        opts.addWidget(self.update_btn)
+        opts.addWidget(self.optimize_btn)
+        opts.addWidget(self.compact_btn)
+        left_layout.addLayout(opts)
+
+        # progress of background writes
+        progress_row = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        progress_row.addWidget(self.progress_bar, stretch=1)
+        self.rate_label = QLabel()
+        self.rate_label.setVisible(False)
+        progress_row.addWidget(self.rate_label)
+        self.cancel_btn = QPushButton(t('cancel', self.lang))
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_tasks)
+        progress_row.addWidget(self.cancel_btn)
+        left_layout.addLayout(progress_row)
+
+        left_layout.addStretch()
+        left_widget.setLayout(left_layout)
+
+        # right panel - log / preview
+        right_widget = QWidget()
+        right_layout = QVBoxLayout()
+        right_layout.setContentsMargins(6, 6, 6, 6)
+        right_layout.setSpacing(8)
+        self.lbl_log = QLabel(t('log_preview', self.lang))
+        right_layout.addWidget(self.lbl_log)
+        self.tabs = QTabWidget()
+        self.log = QPlainTextEdit()
+        self.log.setReadOnly(True)
+        self.log.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.log_sink = LogSink(self.log)
+        self.tabs.addTab(self.log, t('tab_log', self.lang))
+
+        preview_tab = QWidget()
+        preview_layout = QVBoxLayout()
+        preview_layout.setContentsMargins(0, 6, 0, 0)
+        filter_row = QHBoxLayout()
+        self.preview_filter = QLineEdit()
+        self.preview_filter.setPlaceholderText(t('filter', self.lang))
+        filter_row.addWidget(self.preview_filter, stretch=1)
+        self.preview_status = QComboBox()
+        self._fill_status_combo()
+        filter_row.addWidget(self.preview_status)
+        preview_layout.addLayout(filter_row)
+        self.preview_model = PreviewModel(self.lang, self)
+        self.preview_view = QTableView()
+        self.preview_view.setModel(self.preview_model)
+        self.preview_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.preview_view.setWordWrap(False)
+        # fixed row heights keep scrolling independent of the row count
+        self.preview_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.preview_view.verticalHeader().setDefaultSectionSize(22)
+        self.preview_view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.preview_view.horizontalHeader().setStretchLastSection(True)
+        preview_layout.addWidget(self.preview_view)
+        preview_tab.setLayout(preview_layout)
+        self.tabs.addTab(preview_tab, t('tab_preview', self.lang))
+
+        browse_tab = QWidget()
+        browse_layout = QVBoxLayout()
+        browse_layout.setContentsMargins(0, 6, 0, 0)
+        search_row = QHBoxLayout()
+        self.browse_search = QLineEdit()
+        self.browse_search.setPlaceholderText(t('browse_search', self.lang))
+        search_row.addWidget(self.browse_search, stretch=1)
+        self.browse_prefix = QCheckBox(t('browse_prefix', self.lang))
+        search_row.addWidget(self.browse_prefix)
+        self.browse_group = QComboBox()
+        self.browse_group.addItem(t('status_all', self.lang), None)
+        search_row.addWidget(self.browse_group)
+        self.browse_count = QLabel('')
+        search_row.addWidget(self.browse_count)
+        browse_layout.addLayout(search_row)
+        self.browse_model = BrowserModel(self.lang, self)
+        self.browse_view = QTableView()
+        self.browse_view.setModel(self.browse_model)
+        self.browse_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.browse_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.browse_view.setWordWrap(False)
+        self.browse_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.browse_view.verticalHeader().setDefaultSectionSize(22)
+        self.browse_view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.browse_view.horizontalHeader().setStretchLastSection(True)
+        browse_layout.addWidget(self.browse_view)
+        edit_row = QHBoxLayout()
+        self.browse_delete_btn = QPushButton(t('browse_delete', self.lang))
+        self.browse_delete_btn.clicked.connect(self.delete_entries)
+        edit_row.addWidget(self.browse_delete_btn)
+        self.browse_group_btn = QPushButton(t('browse_regroup', self.lang))
+        self.browse_group_btn.clicked.connect(self.regroup_entries)
+        edit_row.addWidget(self.browse_group_btn)
+        self.browse_reason_btn = QPushButton(t('browse_reason', self.lang))
+        self.browse_reason_btn.clicked.connect(self.set_entries_reason)
+        edit_row.addWidget(self.browse_reason_btn)
+        edit_row.addStretch()
+        browse_layout.addLayout(edit_row)
+        browse_tab.setLayout(browse_layout)
+        self.tabs.addTab(browse_tab, t('tab_browse', self.lang))
+        right_layout.addWidget(self.tabs)
+
+        # filtering is debounced so typing does not refilter on every key
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(150)
+        self._filter_timer.timeout.connect(self._apply_preview_filter)
+        self.preview_filter.textChanged.connect(self._filter_timer.start)
+        self.preview_status.currentIndexChanged.connect(self._apply_preview_filter)
+
+        # a search only reads the first page, so it can follow typing closely
+        self._browse_timer = QTimer(self)
+        self._browse_timer.setSingleShot(True)
+        self._browse_timer.setInterval(30)
+        self._browse_timer.timeout.connect(self._apply_browse_query)
+        self.browse_search.textChanged.connect(self._browse_timer.start)
+        self.browse_prefix.toggled.connect(self._apply_browse_query)
+        self.browse_group.currentIndexChanged.connect(self._apply_browse_query)
+        self.tabs.currentChanged.connect(self._refresh_browser)
+
+        # footer hint at bottom of right panel
+        footer = QHBoxLayout()
+        self.watermark = QLabel(t('byline', self.lang))
+        footer.addWidget(self.watermark)
+        footer.addStretch()
+        self.help_label = QLabel(t('footer_hint', self.lang))
+        footer.addWidget(self.help_label)
+        right_layout.addLayout(footer)
+
+        right_widget.setLayout(right_layout)
+
+        # put widgets into splitter
+        splitter.addWidget(left_widget)
+        splitter.addWidget(right_widget)
+        splitter.setStretchFactor(0, 0)
+        splitter.setStretchFactor(1, 1)
+        splitter.setSizes([420, 640])
+
+        root.addWidget(splitter)
+
+        # keyboard shortcuts for power users
+        QShortcut(QKeySequence('Ctrl+P'), self, activated=self.preview)
+        QShortcut(QKeySequence('Ctrl+Return'), self, activated=self.add_to_file)
+        QShortcut(QKeySequence('Ctrl+Z'), self, activated=self.undo_last)
+        QShortcut(QKeySequence('Ctrl+Y'), self, activated=self.redo_last)
+        QShortcut(QKeySequence(QKeySequence.Delete), self.browse_view, activated=self.delete_entries,
+                  context=Qt.WidgetShortcut)
+
+        self._update_mode()
+        self._on_client_changed()
+        self.apply_theme()
+
+    # --- keep existing helper methods mostly unchanged ---
+    def _set_path_placeholder(self):
+        default = Path.home() / "AppData" / "Roaming" / "DDNet" / self._backend_class().default_name
+        self.path_edit.setPlaceholderText(str(default))
+
+    def _on_client_changed(self, _=None):
+        backend = self._backend_class()
+        self.single_clan.setEnabled(backend.uses_clans)
+        self.optimize_btn.setEnabled(backend.can_optimize)
+        self._apply_multi_mutual_exclusion()
+        self._set_path_placeholder()
+        self._on_path_changed()
+
+    def _on_path_changed(self):
+        # drop database handles of other files; a running job keeps its own
+        if not self._tasks:
+            cactus_db.close(keep=self.path_edit.text().strip() or None)
+        self._watch_path()
+        self._refresh_browser()
+
+    def _watch_path(self):
+        path_text = self.path_edit.text().strip()
+        backend = self._backend(path_text) if path_text else None
+        self._last_external_change = None
+
+        def on_change(paths):
+            # watcher thread: refresh the caches here, off the GUI thread
+            backend.refresh()
+            self._external_change.emit([p.name for p in paths])
+
+        self.watcher.watch(backend.watch_files() if backend is not None else [], on_change)
+
+    def _on_external_change(self, names):
+        self._last_external_change = time.monotonic()
+        self.log_sink.post(f'Файл изменён другой программой (DDNet запущен?): {", ".join(names)}')
+        if self._preview_built and not self._preview_stale:
+            self._preview_stale = True
+            self.tabs.setTabText(1, self._preview_tab_title())
+            self.log_sink.post(t('preview_stale', self.lang))
+        self._refresh_browser()
+
+    def _preview_tab_title(self):
+        return t('tab_preview', self.lang) + (' *' if self._preview_stale else '')
+
+    def _confirm_text(self):
+        text = t('confirm_continue', self.lang)
+        if self._preview_stale:
+            text = f"{t('preview_stale', self.lang)}\n\n{text}"
+        if self._last_external_change is not None:
+            age = time.monotonic() - self._last_external_change
+            if age < self.RACE_WINDOW:
+                text = f"{t('race_warning', self.lang).format(seconds=int(age))}\n\n{text}"
+        return text
+
+    def _backend_class(self):
+        return BACKENDS['cactus' if self.client_combo.currentText().lower().startswith('cactus') else 'tater']
+
+    def _backend(self, path_text: str):
+        return self._backend_class()(Path(path_text))
+
+    def _update_mode(self):
+        single = self.single_radio.isChecked()
+        self.single_nick.setEnabled(single)
+        self.single_reason.setEnabled(single)
+        self.single_clan.setEnabled(single and self._backend_class().uses_clans)
+        self.multi_text.setEnabled(not single)
+        self.multi_reason.setEnabled(not single)
+        self._apply_multi_mutual_exclusion()
+
+    def _apply_multi_mutual_exclusion(self):
+        if not self._backend_class().uses_clans or self.single_radio.isChecked():
+            self.multi_clan.setEnabled(False)
+            if not self.single_radio.isChecked():
+                self.multi_text.setEnabled(True)
+            return
+
+        multi_has = bool(self.multi_text.toPlainText().strip())
+        clan_has = bool(self.multi_clan.text().strip())
+
+        if multi_has and not clan_has:
+            self.multi_clan.setEnabled(False)
+            self.multi_text.setEnabled(True)
+        elif clan_has and not multi_has:
+            self.multi_text.setEnabled(False)
+            self.multi_clan.setEnabled(True)
+        elif (not multi_has) and (not clan_has):
+            self.multi_text.setEnabled(True)
+            self.multi_clan.setEnabled(True)
+        else:
+            self.multi_text.setEnabled(True)
+            self.multi_clan.setEnabled(False)
+
+    def _on_multi_text_changed(self):
+        if not self._backend_class().uses_clans or self.single_radio.isChecked():
+            return
+        self._apply_multi_mutual_exclusion()
+
+    def _on_multi_clan_changed(self):
+        if not self._backend_class().uses_clans or self.single_radio.isChecked():
+            return
+        self._apply_multi_mutual_exclusion()
+
+    def browse_file(self):
+        start = str(Path.home() / "AppData" / "Roaming" / "DDNet")
+        path, _ = QFileDialog.getOpenFileName(self, t('choose_file', self.lang), start,
+                                              self._backend_class().file_filter)
+        if path:
+            self.path_edit.setText(path)
+            self._on_path_changed()
+
+    def _gather_entries(self):
+        group = self.group_box.currentText()
+        entries = []
+        if self.single_radio.isChecked():
+            nick = self.single_nick.text().strip()
+            clan = self.single_clan.text().strip() if self._backend_class().uses_clans else ''
+            reason = self.single_reason.text().strip()
+            if not nick and not clan:
+                raise ValueError(t('preview_no_nicks_or_clan', self.lang))
+            entries.append((nick, clan, reason))
+        else:
+            raw = self.multi_text.toPlainText().strip()
+            if not raw and not (self.multi_clan.text().strip() and self._backend_class().uses_clans):
+                raise ValueError(t('preview_no_nicks_or_clan', self.lang))
+            parsed = []
+            if raw:
+                try:
+                    parsed = shlex.split(raw)
+                except Exception as e:
+                    raise ValueError(f'Failed to parse nicks: {e}')
+            reason_all = self.multi_reason.text().strip()
+            clan_all = ''
+            if self._backend_class().uses_clans and self.multi_clan.isEnabled():
+                clan_all = self.multi_clan.text().strip()
+            if not parsed:
+                entries.append(('', clan_all, reason_all))
+            else:
+                seen = set()
+                for token in parsed:
+                    key = token.casefold()
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    entries.append((token, clan_all, reason_all))
+        return group, entries
+
+    def _format_lines(self, group: str, entries):
+        return self._backend_class().format_lines(group, entries)
+
+    def preview(self):
+        try:
+            group, entries = self._gather_entries()
+        except Exception as e:
+            QMessageBox.critical(self, t('error', self.lang), str(e))
+            return
+
+        _, invalid = split_valid(entries)
+        if invalid:
+            QMessageBox.warning(self, t('error', self.lang),
+                                t('validation_invalid_nicks', self.lang) + "\n" + self._describe_invalid(invalid))
+
+        path_text = self.path_edit.text().strip()
+        self._start_task(self._on_preview_done, _preview_job,
+                         self._backend(path_text) if path_text else None, group, entries,
+                         self.similar_checkbox.isChecked())
+
+    def _describe_invalid(self, invalid, limit: int = 50):
+        shown = [f'{nick!r} - {t("nick_" + problem, self.lang)}' for nick, problem in invalid[:limit]]
+        if len(invalid) > limit:
+            shown.append(f'... (+{len(invalid) - limit})')
+        return '\n'.join(shown)
+
+    def _on_preview_done(self, result):
+        self._preview_built = True
+        self._preview_stale = False
+        self.tabs.setTabText(1, self._preview_tab_title())
+        self.preview_model.set_rows(result['rows'])
+        self.tabs.setCurrentIndex(1)
+        counts = result['counts']
+        self.log_sink.post(f'Предпросмотр: {len(result["rows"])} записей - новых {counts[STATUS_NEW]}, '
+                           f'дубликатов {counts[STATUS_DUPLICATE]}, невалидных {counts[STATUS_INVALID]}.')
+        if result['similar'] is not None:
+            self.log_sink.post(f'Похожих на существующие ников: {result["similar"]} (колонка "Похож на", '
+                               f'в скобках - число правок).')
+        self._post_timings(result['timings'])
+
+    def _post_timings(self, timings):
+        if timings:
+            self.log_sink.post('-- SQL (время, вызовы, запрос):')
+            self.log_sink.post('\n'.join(format_timings(timings)))
+
+    def _fill_status_combo(self):
+        current = self.preview_status.currentIndex()
+        self.preview_status.blockSignals(True)
+        self.preview_status.clear()
+        self.preview_status.addItem(t('status_all', self.lang), None)
+        for status in (STATUS_NEW, STATUS_DUPLICATE, STATUS_INVALID):
+            self.preview_status.addItem(t('status_' + status, self.lang), status)
+        self.preview_status.setCurrentIndex(max(current, 0))
+        self.preview_status.blockSignals(False)
+
+    def _apply_preview_filter(self):
+        self.preview_model.set_filter(self.preview_filter.text(), self.preview_status.currentData())
+
+    def _refresh_browser(self, _=None):
+        # the index is built in the background and only while the tab is
+        # shown; an unchanged file reuses the last one
+        if self.tabs.currentIndex() != self.BROWSE_TAB:
+            return
+        path_text = self.path_edit.text().strip()
+        if not path_text:
+            self._on_browse_index(None)
+            return
+        self._start_task(self._on_browse_index, _browse_job, self._backend(path_text))
+
+    def _on_browse_index(self, entries):
+        if entries is not None and entries is self.browse_model.entries:
+            return
+        current = self.browse_group.currentData()
+        self.browse_group.blockSignals(True)
+        self.browse_group.clear()
+        self.browse_group.addItem(t('status_all', self.lang), None)
+        for group in entries.groups() if entries is not None else ():
+            self.browse_group.addItem(group, group)
+        found = self.browse_group.findData(current)
+        self.browse_group.setCurrentIndex(max(found, 0))
+        self.browse_group.blockSignals(False)
+        self.browse_model.set_index(entries)
+        self._apply_browse_query()
+
+    def delete_entries(self):
+        self._edit_entries(EDIT_DELETE)
+
+    def regroup_entries(self):
+        group, ok = QInputDialog.getItem(self, t('browse_regroup', self.lang), t('group', self.lang),
+                                         list(STATE_MAP), 0, False)
+        if ok:
+            self._edit_entries(EDIT_GROUP, group)
+
+    def set_entries_reason(self):
+        reason, ok = QInputDialog.getText(self, t('browse_reason', self.lang), t('reason', self.lang))
+        if ok:
+            self._edit_entries(EDIT_REASON, reason.strip())
+
+    def _edit_entries(self, action, value=None):
+        # the selection goes with what the list showed for it, so the
+        # backend can refuse when the file moved on in the meantime
+        entries = self.browse_model.entries
+        rows = sorted({i.row() for i in self.browse_view.selectionModel().selectedRows()})
+        if entries is None or not rows:
+            QMessageBox.information(self, t('tab_browse', self.lang), t('browse_nothing_selected', self.lang))
+            return
+        targets = {row[0]: row[1:] for row in (self.browse_model.entry(i) for i in rows)}
+        msg = t('browse_confirm_' + action, self.lang).format(count=len(targets), value=value)
+        reply = QMessageBox.question(self, t('tab_browse', self.lang), f'{msg}\n{self._confirm_text()}',
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        backend = self._backend(str(entries.path))
+        self._start_task(self._on_edit_done, _edit_job, backend, targets, action, value,
+                         self.backup_checkbox.isChecked(), writes=backend.watch_files())
+
+    def _on_edit_done(self, result):
+        if result['base']:
+            self.log_sink.post(f'Резервная копия создана: {result["base"]}')
+        if result['cancelled']:
+            self.log_sink.post('Изменение отменено - файл не изменён.')
+            return
+        if result['action'] == EDIT_DELETE:
+            self.log_sink.post(f'{result["path"]}: удалено записей {result["changed"]}.')
+        elif result['action'] == EDIT_GROUP:
+            self.log_sink.post(f'{result["path"]}: перенесено в {result["value"]} - {result["changed"]}, '
+                               f'пропущено (уже есть в группе) - {result["skipped"]}.')
+        else:
+            self.log_sink.post(f'{result["path"]}: причина изменена у {result["changed"]} записей.')
+        if result['delta']:
+            self.log_sink.post(f'Изменение записано в историю: #{result["delta"]["seq"]}')
+        self._post_timings(result['timings'])
+
+    def _apply_browse_query(self, _=None):
+        self.browse_model.set_query(self.browse_search.text(), self.browse_group.currentData(),
+                                    self.browse_prefix.isChecked())
+        entries = self.browse_model.entries
+        group = self.browse_group.currentData()
+        self.browse_count.setText(t('browse_count', self.lang).format(count=entries.group_count(group))
+                                  if entries is not None else '')
+
+    def undo_last(self):
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+        file_path = Path(file_path_text)
+        if not file_path.exists():
+            QMessageBox.warning(self, t('error', self.lang), t('undo_file_missing', self.lang))
+            return
+        backend = self._backend(str(file_path))
+        store = BackupStore.for_backend(backend)
+        applied = [entry for entry in store.history() if entry['applied']]
+        bak = None
+        if applied:
+            msg = f"{t('undo_delta_confirm', self.lang)}?\n{store.describe(applied[-1])}"
+        else:
+            bak = read_last_backup_meta(file_path)
+            if not bak:
+                QMessageBox.information(self, t('undo', self.lang), t('undo_no_backup', self.lang))
+                return
+            msg = f"{t('undo_confirm', self.lang)}?\n{bak}"
+        reply = QMessageBox.question(self, t('undo', self.lang), msg,
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self._start_task(self._on_undo_done, _undo_job, backend, bak, writes=backend.watch_files())
+
+    def _on_undo_done(self, result):
+        self.log_sink.post(f'Откат выполнен: {result["backup"]} -> {result["path"]}')
+        QMessageBox.information(self, t('done', self.lang), t('done', self.lang))
+
+    def redo_last(self):
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+        backend = self._backend(file_path_text)
+        if not any(not entry['applied'] for entry in BackupStore.for_backend(backend).history()):
+            QMessageBox.information(self, t('redo', self.lang), t('redo_nothing', self.lang))
+            return
+        self._start_task(self._on_redo_done, _redo_job, backend, writes=backend.watch_files())
+
+    def _on_redo_done(self, result):
+        self.log_sink.post(f'Повторено: {", ".join(result["entries"])} -> {result["path"]}')
+
+    def restore_base(self):
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+        backend = self._backend(file_path_text)
+        if not BackupStore.for_backend(backend).has_base():
+            QMessageBox.information(self, t('restore_base', self.lang), t('restore_base_missing', self.lang))
+            return
+        reply = QMessageBox.question(self, t('restore_base', self.lang),
+                                     f"{t('restore_base_confirm', self.lang)}\n\n{self._confirm_text()}",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self._start_task(self._on_restore_base_done, _restore_base_job, backend, writes=backend.watch_files())
+
+    def _on_restore_base_done(self, result):
+        self.log_sink.post(f'Базовая копия возвращена: {result["base"]} -> {result["path"]}')
+        if result['entries']:
+            self.log_sink.post(f'Отменено (можно повторить): {", ".join(result["entries"])}')
+
+    def show_history(self):
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+        store = BackupStore.for_backend(self._backend(file_path_text))
+        history = store.history()
+        if not history:
+            self.log_sink.post(t('history_empty', self.lang))
+            return
+        self.log_sink.post(f'-- {t("history", self.lang)}: {store.dir}')
+        self.log_sink.post('\n'.join(store.describe(entry) for entry in history))
+        self.tabs.setCurrentIndex(0)
+
+    def add_to_file(self):
+        reply = QMessageBox.question(self, t('confirm_continue', self.lang), self._confirm_text(),
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+
+        try:
+            group, entries = self._gather_entries()
+        except Exception as e:
+            QMessageBox.critical(self, t('error', self.lang), str(e))
+            return
+
+        backend = self._backend(file_path_text)
+        self._start_task(self._on_add_done, _add_job, backend, group, entries, self.backup_checkbox.isChecked(),
+                         writes=backend.watch_files())
+
+    def _on_add_done(self, result):
+        if result['invalid']:
+            QMessageBox.warning(self, t('error', self.lang),
+                                t('validation_skipped_invalid', self.lang) + "\n" +
+                                self._describe_invalid(result['invalid']))
+        if result['nothing']:
+            QMessageBox.information(self, t('nothing_to_write', self.lang), t('nothing_to_write', self.lang))
+            return
+        self._post_write_meta(result)
+
+        if not result['added'] and not result['cancelled']:
+            QMessageBox.information(self, t('nothing_to_write', self.lang), t('nothing_to_write', self.lang))
+            self.log_sink.post('Новые записи не найдены - ничего не записано.')
+            return
+        msg = f"{t('done', self.lang)}: {result['added']} записей добавлено."
+        if result['skipped']:
+            msg += f" Пропущено дубликатов: {result['skipped']}."
+        if result['skipped_entries']:
+            self.log_sink.post('\n-- Пропущенные дубликаты:')
+            self.log_sink.post('\n'.join(f'{nick} ({clan})' for nick, clan in result['skipped_entries']))
+
+        self.log_sink.post(f'Записано {result["added"]} строк в {result["path"]}')
+        if result['cancelled']:
+            self.log_sink.post('Операция отменена - оставшиеся записи не записаны.')
+        self._post_timings(result['timings'])
+        QMessageBox.information(self, t('done', self.lang), msg)
+
+    def add_to_many(self):
+        try:
+            group, entries = self._gather_entries()
+        except Exception as e:
+            QMessageBox.critical(self, t('error', self.lang), str(e))
+            return
+        file_path_text = self.path_edit.text().strip()
+        start = str(Path(file_path_text).parent) if file_path_text else str(Path.home() / "AppData" / "Roaming")
+        others, _ = QFileDialog.getOpenFileNames(self, t('add_many', self.lang), start, t('sync_filter', self.lang))
+        if not others:
+            return
+        # the current file keeps the chosen client, the others go by extension
+        targets = [self._backend(file_path_text)] if file_path_text else []
+        targets.extend(open_backend(Path(other)) for other in others)
+        listed = '\n'.join(str(backend.path) for backend in targets)
+        reply = QMessageBox.question(self, t('add_many', self.lang),
+                                     f"{t('add_many_targets', self.lang)}\n{listed}\n\n{self._confirm_text()}",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self._start_task(self._on_add_many_done, _add_many_job, targets, group, entries,
+                         self.backup_checkbox.isChecked(), writes=[p for b in targets for p in b.watch_files()])
+
+    def _on_add_many_done(self, result):
+        if result['invalid']:
+            QMessageBox.warning(self, t('error', self.lang),
+                                t('validation_skipped_invalid', self.lang) + "\n" +
+                                self._describe_invalid(result['invalid']))
+        if result['nothing']:
+            QMessageBox.information(self, t('nothing_to_write', self.lang), t('nothing_to_write', self.lang))
+            return
+        failed = 0
+        added = 0
+        for target in result['targets']:
+            if target['error']:
+                failed += 1
+                self.log_sink.post(f'{target["path"]}: ошибка - {target["error"]}')
+                continue
+            added += target['added']
+            line = (f'{target["path"]}: добавлено {target["added"]}, дубликатов {target["skipped"]} '
+                    f'({target["seconds"]:.2f} с)')
+            if target['clan_only']:
+                line += f', пропущено записей только с кланом: {target["clan_only"]}'
+            self.log_sink.post(line)
+            if target['base']:
+                self.log_sink.post(f'Резервная копия создана: {target["base"]}')
+            if target['delta']:
+                self.log_sink.post(f'Изменение записано в историю: #{target["delta"]["seq"]}')
+            self._post_timings(target['timings'])
+        if any(target['cancelled'] for target in result['targets']):
+            self.log_sink.post('Операция отменена - оставшиеся записи не записаны.')
+        msg = f"{t('done', self.lang)}: {len(result['targets'])} файлов, {added} записей добавлено."
+        if failed:
+            msg += f" Ошибок: {failed} (подробности в логе)."
+        self.log_sink.post(msg)
+        QMessageBox.information(self, t('done', self.lang), msg)
+
+    def _post_write_meta(self, result):
+        if result['sidecars']:
+            self.log_sink.post(f'База открыта в режиме WAL ({", ".join(result["sidecars"])}): '
+                               'копия снята через SQLite backup API. Закройте клиент перед записью.')
+        if result.get('recovered'):
+            self.log_sink.post(f'Журнал незавершённой записи обработан: {result["recovered"]}')
+        if result['base']:
+            self.log_sink.post(f'Резервная копия создана: {result["base"]}')
+        if result['delta']:
+            self.log_sink.post(f'Изменение записано в историю: #{result["delta"]["seq"]}')
+
+    def import_file(self):
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+        source, _ = QFileDialog.getOpenFileName(self, t('import', self.lang), str(Path.home()),
+                                                t('import_filter', self.lang))
+        if not source:
+            return
+        if Path(source).resolve() == Path(file_path_text).resolve():
+            # appending to the file being read would never reach its end
+            QMessageBox.warning(self, t('error', self.lang), t('import_same_file', self.lang))
+            return
+        reply = QMessageBox.question(self, t('import', self.lang), self._confirm_text(),
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        backend = self._backend(file_path_text)
+        clan = self.multi_clan.text().strip() if backend.uses_clans else ''
+        self._start_task(self._on_import_done, _import_job, backend, Path(source), self.group_box.currentText(),
+                         clan, self.multi_reason.text().strip(), self.backup_checkbox.isChecked(),
+                         writes=backend.watch_files())
+
+    def _on_import_done(self, result):
+        self._post_write_meta(result)
+        rate = result['rows'] / max(result['seconds'], 1e-6)
+        self.log_sink.post(f'Импорт {result["source"]} ({result["format"]}): {result["rows"]} строк за '
+                           f'{result["seconds"]:.1f} с ({rate:.0f} строк/с) - добавлено {result["added"]}, '
+                           f'дубликатов {result["skipped"]}, отклонено {result["rejected"]}.')
+        if result['rejected_lines']:
+            self.log_sink.post('-- Отклонённые строки:')
+            self.log_sink.post('\n'.join(result['rejected_lines']))
+            if result['rejected'] > len(result['rejected_lines']):
+                self.log_sink.post(f'... (+{result["rejected"] - len(result["rejected_lines"])})')
+        if result['cancelled']:
+            self.log_sink.post('Операция отменена - оставшиеся записи не записаны.')
+        self._post_timings(result['timings'])
+        self.tabs.setCurrentIndex(0)
+
+    def sync_file(self):
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+        other, _ = QFileDialog.getOpenFileName(self, t('sync', self.lang), str(Path(file_path_text).parent),
+                                               t('sync_filter', self.lang))
+        if not other:
+            return
+        if Path(other).resolve() == Path(file_path_text).resolve():
+            QMessageBox.warning(self, t('error', self.lang), t('sync_same_file', self.lang))
+            return
+        box = QMessageBox(self)
+        box.setWindowTitle(t('sync', self.lang))
+        box.setText(f"{t('sync_direction', self.lang)}\n{file_path_text} -> {other}\n\n"
+                    f"{self._confirm_text()}")
+        export_btn = box.addButton(t('sync_export', self.lang), QMessageBox.ButtonRole.AcceptRole)
+        both_btn = box.addButton(t('sync_both', self.lang), QMessageBox.ButtonRole.AcceptRole)
+        box.addButton(t('cancel', self.lang), QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        if box.clickedButton() not in (export_btn, both_btn):
+            return
+        source = self._backend(file_path_text)
+        self._start_task(self._on_sync_done, _sync_job, source, Path(other), box.clickedButton() is both_btn,
+                         self.backup_checkbox.isChecked(),
+                         writes=source.watch_files() + open_backend(Path(other)).watch_files())
+
+    def _on_sync_done(self, result):
+        self.log_sink.post(f'Синхронизация: {result["source"]} ({result["source_total"]} записей) и '
+                           f'{result["target"]} ({result["target_total"]} записей)')
+        for name, src, dst in (('forward', result['source'], result['target']),
+                               ('backward', result['target'], result['source'])):
+            applied = result['applied'].get(name)
+            if applied is None:
+                continue
+            self.log_sink.post(f'{src} -> {dst}: добавлено {applied["added"]}')
+            if applied['base']:
+                self.log_sink.post(f'Резервная копия создана: {applied["base"]}')
+            if applied['delta']:
+                self.log_sink.post(f'Изменение записано в историю {dst}: #{applied["delta"]["seq"]}')
+        if not result['applied']:
+            self.log_sink.post('Списки уже совпадают - ничего не записано.')
+        stats = result['stats']
+        if stats['clan_dropped']:
+            self.log_sink.post(f'Cactus не хранит кланы: {stats["clan_dropped"]} записей скопировано без клана.')
+        if stats['clan_only']:
+            self.log_sink.post(f'Пропущено записей только с кланом (без ника): {stats["clan_only"]}.')
+        if stats['unmapped']:
+            self.log_sink.post(f'Пропущено записей с группой вне enemy/team: {stats["unmapped"]}.')
+        self._post_timings(result['timings'])
+        self.tabs.setCurrentIndex(0)
+
+    def optimize_db(self):
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+        file_path = Path(file_path_text)
+        if not file_path.exists():
+            QMessageBox.warning(self, t('error', self.lang), t('undo_file_missing', self.lang))
+            return
+        reply = QMessageBox.question(self, t('optimize_db', self.lang), self._confirm_text(),
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self._start_task(self._on_optimize_done, _optimize_job, file_path, self.backup_checkbox.isChecked(),
+                         writes=self._backend(file_path_text).watch_files())
+
+    def _on_optimize_done(self, result):
+        if result['base']:
+            self.log_sink.post(f'Резервная копия создана: {result["base"]}')
+        if result['created']:
+            self.log_sink.post(f'Индекс создан: {result["name"]}')
+        else:
+            self.log_sink.post(f'Индекс уже существует: {result["name"]}')
+        self.log_sink.post('EXPLAIN QUERY PLAN:')
+        self.log_sink.post('\n'.join(result['plan']))
+
+    def compact_file(self):
+        file_path_text = self.path_edit.text().strip()
+        if not file_path_text:
+            QMessageBox.warning(self, t('error', self.lang), t('no_file', self.lang))
+            return
+        if not Path(file_path_text).exists():
+            QMessageBox.warning(self, t('error', self.lang), t('undo_file_missing', self.lang))
+            return
+        reply = QMessageBox.question(self, t('compact', self.lang), self._confirm_text(),
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        backend = self._backend(file_path_text)
+        self._start_task(self._on_compact_done, _compact_job, backend, self.backup_checkbox.isChecked(),
+                         writes=backend.watch_files())
+
+    def _on_compact_done(self, result):
+        if result['base']:
+            self.log_sink.post(f'Резервная копия создана: {result["base"]}')
+        if result['cancelled']:
+            self.log_sink.post('Сжатие отменено - файл не изменён.')
+            return
+        if not result['removed']:
+            self.log_sink.post(t('compact_nothing', self.lang))
+            return
+        self.log_sink.post(f'Сжатие {result["path"]}: удалено повторов {result["removed"]}, '
+                           f'размер {result["size_before"]} -> {result["size_after"]} байт, '
+                           f'загрузка ключей {result["parse_before"] * 1000:.0f} -> '
+                           f'{result["parse_after"] * 1000:.0f} мс')
+        if result['delta']:
+            self.log_sink.post(f'Изменение записано в историю: #{result["delta"]["seq"]}')
+        self._post_timings(result['timings'])
+
+    def _start_task(self, on_result, fn, *args, writes=()):
+        # on_result must be a bound method of this widget so the queued
+        # connection delivers it on the GUI thread. writes are the files
+        # the job writes: our own changes there are not outside changes
+        task = Task(fn, *args)
+        if writes:
+            task.writing = self.watcher.own_write(writes)
+        task.signals.result.connect(on_result)
+        task.signals.error.connect(self._on_task_error)
+        task.signals.progress.connect(self._on_task_progress)
+        task.signals.finished.connect(self._on_task_finished)
+        self._tasks.add(task)
+        self.pool.start(task)
+        return task
+
+    def _on_task_progress(self, done, total, rate):
+        # streamed jobs do not know their total: busy bar plus a row rate
+        self.progress_bar.setMaximum(total if total > 0 else 0)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setVisible(True)
+        self.rate_label.setText(f'{done} строк, {rate:.0f} строк/с')
+        self.rate_label.setVisible(total <= 0)
+        self.cancel_btn.setVisible(True)
+
+    def _on_task_error(self, exc):
+        if isinstance(exc, BackupError) and not isinstance(exc, BackupConflictError):
+            QMessageBox.critical(self, t('error', self.lang), f'{t("create_backup_failed", self.lang)} {exc}')
+        else:
+            QMessageBox.critical(self, t('error', self.lang), str(exc))
+
+    def _on_task_finished(self, task):
+        self._tasks.discard(task)
+        if not self._tasks:
+            self.progress_bar.setVisible(False)
+            self.rate_label.setVisible(False)
+            self.cancel_btn.setVisible(False)
+            if task.fn is not _browse_job:
+                # whatever the job wrote shows up in the browser
+                self._refresh_browser()
+
+    def cancel_tasks(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    def closeEvent(self, event):
+        self.watcher.stop()
+        self.cancel_tasks()
+        self.pool.waitForDone(5000)
+        self.browse_model.set_index(None)
+        cactus_db.close()
+        super().closeEvent(event)
+
+    def _on_bg_update_checked(self, checked):
+        success, data = checked
+        if success:
+            tag = data.get('tag_name')
+            if tag:
+                latest = parse_version_tag(tag)
+                current = parse_version_tag(__version__)
+                if latest and latest > current:
+                    self.log_sink.post(f'Новая версия: {tag} - откройте репозиторий для обновления: {REPO_PAGE}')
+                else:
+                    self.log_sink.post('Проверка обновлений: у вас последняя версия.')
+        else:
+            self.log_sink.post(f'Проверка обновлений не удалась: {data}')
+
+    def _on_update_checked(self, checked):
+        success, data = checked
+        if not success:
+            QMessageBox.information(self, t('check_updates', self.lang), f'Не удалось проверить обновления:\n{data}')
+            return
+        tag = data.get('tag_name')
+        url = data.get('html_url') or REPO_PAGE
+        if tag:
+            latest = parse_version_tag(tag)
+            current = parse_version_tag(__version__)
+            if latest and latest > current:
+                resp = QMessageBox.question(
+                    self,
+                    t('update_available', self.lang),
+                    f"{t('update_available', self.lang)} {tag} (текущая: {__version__}). {t('update_open_repo', self.lang)}",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+                )
+                if resp == QMessageBox.StandardButton.Yes:
+                    import webbrowser
+                    webbrowser.open(url)
+            else:
+                QMessageBox.information(self, t('check_updates', self.lang), 'У вас последняя версия.')
+        else:
+            QMessageBox.information(self, t('check_updates', self.lang), 'Не удалось получить информацию о релизе.')
+
+    def apply_theme(self):
+        # modernized stylesheet with an accent color and consistent paddings
+        accent = '#0078d4'
+        if self.theme == 'dark':
+            stylesheet = f"""
+            QWidget {{ background: #0f1113; color: #e6eef8; font-family: 'Segoe UI', Arial; font-size: 10pt; }}
+            QGroupBox {{ background: #151719; border: 1px solid #232629; border-radius: 8px; margin-top: 6px; padding: 8px; font-weight: 600; }}
+            QLabel {{ color: #e6eef8 }}
+            QLineEdit, QPlainTextEdit, QTextEdit, QComboBox {{ background: #0f1316; border: 1px solid #2b3134; color: #e6eef8; padding: 6px; border-radius: 6px; selection-background-color: {accent}; }}
+            QPushButton {{ background: #1b1f22; color: #e6eef8; border: 1px solid #2b3134; padding: 8px 14px; border-radius: 8px; font-weight: 700; }}
+            QPushButton:hover {{ background: #22272a }}
+            QPushButton:pressed {{ background: #121415 }}
+            QComboBox::drop-down {{ border: none }}
+            QScrollBar:vertical {{ background: transparent; width: 10px }}
+            QScrollBar::handle:vertical {{ background: #2b3134; border-radius: 5px; min-height: 20px }}
+            """
+        else:
+            stylesheet = f"""
+            QWidget {{ background: #fbfdff; color: #1a1a1a; font-family: 'Segoe UI', Arial; font-size: 10pt; }}
+            QGroupBox {{ background: #ffffff; border: 1px solid #e6ebf0; border-radius: 8px; margin-top: 6px; padding: 8px; font-weight: 600; }}
+            QLabel {{ color: #1a1a1a }}
+            QLineEdit, QPlainTextEdit, QTextEdit, QComboBox {{ background: #ffffff; border: 1px solid #dfe7ee; color: #1a1a1a; padding: 6px; border-radius: 6px; selection-background-color: {accent}; }}
+            QPushButton {{ background: #f0f4f8; color: #1a1a1a; border: 1px solid #dfe7ee; padding: 8px 14px; border-radius: 8px; font-weight: 700; }}
+            QPushButton:hover {{ background: #e9f1fb }}
+            QPushButton:pressed {{ background: #dfeaf7 }}
+            QComboBox::drop-down {{ border: none }}
+            QScrollBar:vertical {{ background: transparent; width: 10px }}
+            QScrollBar::handle:vertical {{ background: #cfdbe6; border-radius: 5px; min-height: 20px }}
+            """
+        self.setStyleSheet(stylesheet)
+
+    def _on_theme_changed(self, idx):
+        self.theme = 'dark' if idx == 0 else 'light'
+        self.apply_theme()
+
+    def _on_language_changed(self, idx):
+        self.lang = 'ru' if idx == 0 else 'en'
+        self._retranslate_ui()
+
+    def _retranslate_ui(self):
+        # minimal retranslation - keep layout but update labels
+        self.setWindowTitle(f"{t('title', self.lang)} - {__version__}")
+        self.lbl_client.setText(t('client', self.lang))
+        self.lbl_path.setText(t('path', self.lang))
+        self.browse_btn.setText(t('choose_file', self.lang))
+        self.mode_group = t('mode', self.lang)
+        self.single_radio.setText(t('single', self.lang))
+        self.multi_radio.setText(t('multi', self.lang))
+        self.single_nick.setPlaceholderText(t('nick', self.lang) + (' (например: Player123)' if self.lang == 'ru' else ' (e.g. Player123)'))
+        self.single_clan.setPlaceholderText(t('clan', self.lang))
+        self.single_reason.setPlaceholderText(t('reason', self.lang))
+        self.multi_text.setPlaceholderText(t('multi_hint', self.lang))
+        self.multi_reason.setPlaceholderText(t('reason', self.lang))
+        self.multi_clan.setPlaceholderText(t('multi_clan_label', self.lang))
+        self.lbl_group.setText(t('group', self.lang))
+        self.backup_checkbox.setText(t('backup', self.lang))
+        self.similar_checkbox.setText(t('similar', self.lang))
+        self.similar_checkbox.setToolTip(t('similar_hint', self.lang))
+        self.preview_btn.setText(t('preview', self.lang))
+        self.add_btn.setText(t('add', self.lang))
+        self.add_many_btn.setText(t('add_many', self.lang))
+        self.add_many_btn.setToolTip(t('add_many_hint', self.lang))
+        self.import_btn.setText(t('import', self.lang))
+        self.import_btn.setToolTip(t('import_hint', self.lang))
+        self.sync_btn.setText(t('sync', self.lang))
+        self.sync_btn.setToolTip(t('sync_hint', self.lang))
+        self.undo_btn.setText(t('undo', self.lang))
+        self.redo_btn.setText(t('redo', self.lang))
+        self.history_btn.setText(t('history', self.lang))
+        self.restore_base_btn.setText(t('restore_base', self.lang))
+        self.restore_base_btn.setToolTip(t('restore_base_hint', self.lang))
+        self.update_btn.setText(t('check_updates', self.lang))
+        self.optimize_btn.setText(t('optimize_db', self.lang))
+        self.optimize_btn.setToolTip(t('optimize_db_hint', self.lang))
+        self.compact_btn.setText(t('compact', self.lang))
+        self.compact_btn.setToolTip(t('compact_hint', self.lang))
+        self.cancel_btn.setText(t('cancel', self.lang))
+        self.lbl_log.setText(t('log_preview', self.lang))
+        self.tabs.setTabText(0, t('tab_log', self.lang))
+        self.tabs.setTabText(1, self._preview_tab_title())
+        self.preview_filter.setPlaceholderText(t('filter', self.lang))
+        self._fill_status_combo()
+        self.preview_model.set_lang(self.lang)
+        self.tabs.setTabText(self.BROWSE_TAB, t('tab_browse', self.lang))
+        self.browse_search.setPlaceholderText(t('browse_search', self.lang))
+        self.browse_prefix.setText(t('browse_prefix', self.lang))
+        self.browse_delete_btn.setText(t('browse_delete', self.lang))
+        self.browse_group_btn.setText(t('browse_regroup', self.lang))
+        self.browse_reason_btn.setText(t('browse_reason', self.lang))
+        self.browse_group.setItemText(0, t('status_all', self.lang))
+        self.browse_model.set_lang(self.lang)
+        self._apply_browse_query()
+        self.help_label.setText(t('footer_hint', self.lang))
+        self.watermark.setText(t('byline', self.lang))
+        self.theme_combo.setItemText(0, t('theme_dark', self.lang))
+        self.theme_combo.setItemText(1, t('theme_light', self.lang))
+        self._set_path_placeholder()
+
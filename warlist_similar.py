@@ -0,0 +1,184 @@
+import threading
+from array import array
+from functools import lru_cache
+
+from warlist_core import file_signature
+
+# --- near-duplicate nicks ---
+# griefers rejoin as K1ng, King. or Kiing. Every nick is reduced to a
+# skeleton (casefolded, look-alike digits and symbols mapped to letters,
+# everything but letters and digits dropped), so K1ng and King. meet
+# exactly. Skeletons a few edits apart are found by partitioning: an
+# indexed skeleton is cut into k + 1 pieces, and a string within k edits
+# of it must still contain one of the pieces unchanged, shifted by at most
+# k. A query therefore only looks up its own substrings at those offsets
+# and checks the handful of hits with a bounded Levenshtein.
+
+LEET = str.maketrans({'0': 'o', '1': 'i', '!': 'i', '|': 'l', '3': 'e', '4': 'a', '@': 'a', '5': 's', '$': 's',
+                      '7': 't', '8': 'b', '9': 'g'})
+MAX_MATCHES = 3
+
+
+def skeleton(nick: str) -> str:
+    return ''.join(ch for ch in nick.casefold().translate(LEET) if ch.isalnum())
+
+
+def max_distance(size: int) -> int:
+    # one edit away from a three-letter nick is half the list
+    if size < 4:
+        return 0
+    return 1 if size <= 8 else 2
+
+
+@lru_cache(maxsize=None)
+def _pieces(size: int, k: int):
+    # (start, length) of k + 1 near-equal pieces, the longer ones last
+    parts = k + 1
+    base, extra = divmod(size, parts)
+    pieces = []
+    start = 0
+    for i in range(parts):
+        length = base + (i >= parts - extra)
+        pieces.append((start, length))
+        start += length
+    return pieces
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    # edit distance, or limit + 1 once it must exceed limit; only the band
+    # of limit cells either side of the diagonal can stay within it
+    big = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return big
+    prev = [j if j <= limit else big for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        cur = [big] * (len(b) + 1)
+        lo = max(1, i - limit)
+        if lo == 1:
+            cur[0] = i if i <= limit else big
+        best = cur[0]
+        for j in range(lo, min(len(b), i + limit) + 1):
+            d = prev[j - 1] + (ca != b[j - 1])
+            if prev[j] < d:
+                d = prev[j] + 1
+            if cur[j - 1] < d:
+                d = cur[j - 1] + 1
+            if d > big:
+                d = big
+            cur[j] = d
+            if d < best:
+                best = d
+        if best > limit:
+            return big
+        prev = cur
+    return prev[-1]
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self._skeletons = []
+        self._ids = {}
+        self._names = []
+        self._pieces = {}
+        self._nicks = set()
+
+    def __len__(self):
+        return len(self._nicks)
+
+    def add(self, nick: str):
+        key = nick.casefold()
+        if not key or key in self._nicks:
+            return
+        self._nicks.add(key)
+        skel = skeleton(nick)
+        if not skel:
+            return
+        sid = self._ids.get(skel)
+        if sid is None:
+            sid = self._ids[skel] = len(self._skeletons)
+            self._skeletons.append(skel)
+            self._names.append([])
+            size = len(skel)
+            if max_distance(size):
+                for i, (start, length) in enumerate(_pieces(size, max_distance(size))):
+                    self._pieces.setdefault((skel[start:start + length], size, i), array('l')).append(sid)
+        self._names[sid].append(nick)
+
+    def keys(self):
+        return self._nicks
+
+    def matches(self, nick: str, limit: int = MAX_MATCHES):
+        # [(distance, existing nick)] closest first; exact duplicates are
+        # not near-duplicates and are left out
+        skel = skeleton(nick)
+        if not skel:
+            return []
+        key = nick.casefold()
+        found = []
+        sid = self._ids.get(skel)
+        if sid is not None:
+            found.extend((0, name) for name in self._names[sid] if name.casefold() != key)
+        size_q = len(skel)
+        reach = max_distance(size_q)
+        candidates = {}
+        for size in range(size_q - reach, size_q + reach + 1):
+            # the shorter side sets the allowed distance
+            k = min(reach, max_distance(size))
+            if not k or abs(size - size_q) > k:
+                continue
+            parts = max_distance(size)
+            shift = size_q - size
+            for i, (start, length) in enumerate(_pieces(size, parts)):
+                # piece i can only have moved by what the pieces before and
+                # after it leave over (multi-match-aware window)
+                lo = max(0, start - i, start + shift - (parts - i))
+                hi = min(size_q - length, start + i, start + shift + (parts - i))
+                for pos in range(lo, hi + 1):
+                    hits = self._pieces.get((skel[pos:pos + length], size, i))
+                    if hits:
+                        for other in hits:
+                            candidates[other] = k
+        candidates.pop(sid, None)
+        chars = set(skel)
+        for other, k in candidates.items():
+            other_skel = self._skeletons[other]
+            # an edit changes at most two distinct characters, a cheap
+            # reject before the quadratic check
+            if len(chars.symmetric_difference(other_skel)) > 2 * k:
+                continue
+            d = bounded_levenshtein(skel, other_skel, k)
+            if d <= k:
+                found.extend((d, name) for name in self._names[other])
+        found.sort()
+        return found[:limit]
+
+
+# one index per warlist. When the files change, keys present now but not
+# in the index are added to it (with the spelling load_keys gives them);
+# only a removal - undo, compaction, an outside edit - rebuilds it
+_indexes = {}
+_indexes_guard = threading.Lock()
+
+
+def similarity_index(backend) -> SimilarityIndex:
+    key = str(backend.path.resolve())
+    sig = tuple(file_signature(p) for p in backend.watch_files())
+    with _indexes_guard:
+        entry = _indexes.get(key)
+        if entry is not None and entry[1] == sig:
+            return entry[0]
+        index = entry[0] if entry is not None else None
+        if index is not None:
+            current = {k[1].casefold(): k[1] for k in backend.load_keys() if k[1]}
+            if index.keys() <= current.keys():
+                for nick_key in current.keys() - index.keys():
+                    index.add(current[nick_key])
+            else:
+                index = None
+        if index is None:
+            index = SimilarityIndex()
+            for row in backend.iter_rows():
+                if row[1]:
+                    index.add(row[1])
+        _indexes[key] = (index, sig)
+        return index